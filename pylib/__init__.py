@@ -3,4 +3,4 @@
 # This source code is licensed under End User License Agreement found in the
 # LICENSE file at http://www.apstra.com/community/eula
 
-__import__('pkg_resources').declare_namespace('apstra')
+__path__ = __import__('pkgutil').extend_path(__path__, __name__)
@@ -3,5 +3,13 @@
 # This source code is licensed under End User License Agreement found in the
 # LICENSE file at http://www.apstra.com/community/eula
 
-from pkg_resources import get_distribution
-__version__ = get_distribution('aos-pyez').version
+try:
+    # importlib.metadata is much faster to import than pkg_resources
+    from importlib.metadata import version as _dist_version
+except ImportError:
+    from pkg_resources import get_distribution
+
+    def _dist_version(dist_name):
+        return get_distribution(dist_name).version
+
+__version__ = _dist_version('aos-pyez')
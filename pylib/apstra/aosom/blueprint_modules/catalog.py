@@ -6,5 +6,6 @@
 AosModuleCatalog = {
     # key=resource-name, value=module-name
     "VirtualNetworks": "virtnets",
-    "params": 'slot_params'
+    "params": 'slot_params',
+    "graph": 'graph'
 }
@@ -0,0 +1,158 @@
+# Copyright 2014-present, Apstra, Inc. All rights reserved.
+#
+# This source code is licensed under End User License Agreement found in the
+# LICENSE file at http://www.apstra.com/community/eula
+
+"""
+Structural comparison of two versions of the blueprint contents, reporting the
+nodes and relationships, by ID, that were added, removed or changed.  For example::
+
+    before = ContentsDigest(blueprint.contents)
+    ... make some changes ...
+    changes = blueprint.diff(before)
+    print changes.nodes.changed, changes.relationships.added
+
+Either version may be the contents themselves or a :class:`ContentsDigest` of them.
+A digest keeps only a hash of each node and relationship, so it is much smaller than
+the contents it was made from; keep a digest, rather than the contents, when the
+version is only needed for a later comparison.
+"""
+
+import json
+import hashlib
+from collections import namedtuple
+
+from apstra.aosom.blueprint_modules.graph import _by_id
+
+__all__ = [
+    'BlueprintDiff',
+    'ChangeSet',
+    'ContentsDigest',
+    'diff_contents'
+]
+
+#: the contents sections compared item by item
+ITEM_SECTIONS = ('nodes', 'relationships')
+
+#: the IDs of the items that differ between two versions, each a sorted list
+ChangeSet = namedtuple('ChangeSet', ['added', 'removed', 'changed'])
+
+#: the differences between two versions of the blueprint contents
+#:   * `nodes` - the :data:`ChangeSet` of the nodes
+#:   * `relationships` - the :data:`ChangeSet` of the relationships
+#:   * `sections` - the sorted list of the other contents keys whose value differs
+
+BlueprintDiff = namedtuple('BlueprintDiff', ['nodes', 'relationships', 'sections'])
+
+
+def _hash(value):
+    return hashlib.sha1(json.dumps(
+        value, sort_keys=True, separators=(',', ':')).encode('utf-8')).digest()
+
+
+class ContentsDigest(object):
+    """
+    The hashes of one version of the blueprint contents: a hash of each node and
+    relationship by ID, a hash of each of the other sections, and a hash of each
+    whole section so that identical sections are skipped without comparing items.
+    """
+    def __init__(self, contents):
+        """
+        Args:
+            contents (dict): the blueprint contents
+        """
+        self.items = {}
+        self.sections = {}
+
+        for key, value in contents.items():
+            if key not in ITEM_SECTIONS:
+                self.sections[key] = _hash(value)
+                continue
+
+            hashes = self.items[key] = {
+                item_id: _hash(item) for item_id, item in _by_id(value).items()}
+
+            self.sections[key] = hashlib.sha1(b''.join(
+                item_id.encode('utf-8') + hashes[item_id]
+                for item_id in sorted(hashes))).digest()
+
+    def __eq__(self, other):
+        return isinstance(other, ContentsDigest) and self.sections == other.sections
+
+    def __ne__(self, other):
+        return not self == other
+
+
+def _no_changes():
+    return ChangeSet([], [], [])
+
+
+def _change_set(old, new, same):
+    added = sorted(set(new) - set(old))
+    removed = sorted(set(old) - set(new))
+    changed = sorted(item_id for item_id in set(old) & set(new)
+                     if not same(old[item_id], new[item_id]))
+
+    return ChangeSet(added, removed, changed)
+
+
+def _diff_digests(old, new):
+    item_changes = {}
+    for key in ITEM_SECTIONS:
+        if old.sections.get(key) == new.sections.get(key):
+            item_changes[key] = _no_changes()
+        else:
+            item_changes[key] = _change_set(
+                old.items.get(key, {}), new.items.get(key, {}), lambda a, b: a == b)
+
+    sections = sorted(
+        key for key in set(old.sections) | set(new.sections)
+        if key not in ITEM_SECTIONS and old.sections.get(key) != new.sections.get(key))
+
+    return BlueprintDiff(item_changes['nodes'], item_changes['relationships'], sections)
+
+
+def _diff_contents(old, new):
+    # the same object, as when the contents were not modified on the AOS-server
+    # and came from the cache, needs no comparison; otherwise the values are
+    # compared directly, which is faster than hashing them.
+
+    def same(a, b):
+        return a is b or a == b
+
+    item_changes = {}
+    for key in ITEM_SECTIONS:
+        if same(old.get(key), new.get(key)):
+            item_changes[key] = _no_changes()
+        else:
+            item_changes[key] = _change_set(
+                _by_id(old.get(key)), _by_id(new.get(key)), same)
+
+    missing = object()
+    sections = sorted(
+        key for key in set(old) | set(new)
+        if key not in ITEM_SECTIONS and not same(old.get(key, missing), new.get(key, missing)))
+
+    return BlueprintDiff(item_changes['nodes'], item_changes['relationships'], sections)
+
+
+def diff_contents(old, new):
+    """
+    Compares two versions of the blueprint contents.
+
+    Args:
+        old: the earlier contents (dict), or its :class:`ContentsDigest`
+        new: the later contents (dict), or its :class:`ContentsDigest`
+
+    Returns:
+        a :data:`BlueprintDiff`
+    """
+    if old is new:
+        return BlueprintDiff(_no_changes(), _no_changes(), [])
+
+    if isinstance(old, ContentsDigest) or isinstance(new, ContentsDigest):
+        return _diff_digests(
+            old if isinstance(old, ContentsDigest) else ContentsDigest(old),
+            new if isinstance(new, ContentsDigest) else ContentsDigest(new))
+
+    return _diff_contents(old, new)
@@ -0,0 +1,230 @@
+# Copyright 2014-present, Apstra, Inc. All rights reserved.
+#
+# This source code is licensed under End User License Agreement found in the
+# LICENSE file at http://www.apstra.com/community/eula
+
+from collections import defaultdict
+
+__all__ = ['BlueprintGraph']
+
+
+def _by_id(values):
+    if isinstance(values, dict):
+        return values
+
+    return {value['id']: value for value in values or []}
+
+
+def _hashable(value):
+    # list and dict property values are indexed by an equivalent hashable value
+
+    if isinstance(value, list):
+        return tuple(_hashable(each) for each in value)
+
+    if isinstance(value, dict):
+        return frozenset((key, _hashable(each)) for key, each in value.items())
+
+    return value
+
+
+class BlueprintGraph(object):
+    """
+    A graph view of the blueprint contents, that is the blueprint `nodes` and the
+    `relationships` between them.  For example::
+
+        >>> graph = aos.Blueprints['my-pod'].graph
+        >>> [node['label'] for node in graph.find(type='system', role='spine')]
+        [u'spine_1', u'spine_2']
+        >>> graph.neighbors(spine_id, rel_type='hosted_interfaces')
+
+    Node lookup by ID is a dictionary access.  The indexes used by :meth:`find` and
+    the adjacency used by :meth:`neighbors` are each built on first use, so only the
+    indexes used are built.  The blueprint contents are retrieved when first needed;
+    use :meth:`refresh` to update the graph with the current contents.
+    """
+    def __init__(self, owner=None, contents=None):
+        """
+        Args:
+            owner: the :class:`BlueprintCollectionItem`
+            contents (dict): blueprint contents to use instead of retrieving them
+        """
+        self.blueprint = owner
+        self._contents = contents
+        self._clear()
+
+    # =========================================================================
+    #
+    #                             PROPERTIES
+    #
+    # =========================================================================
+
+    @property
+    def contents(self):
+        if self._contents is None:
+            self.refresh()
+
+        return self._contents
+
+    @property
+    def nodes(self):
+        """
+        Returns:
+            dict of node ID to node
+        """
+        if self._nodes is None:
+            self._nodes = _by_id(self.contents.get('nodes'))
+
+        return self._nodes
+
+    @property
+    def relationships(self):
+        """
+        Returns:
+            dict of relationship ID to relationship
+        """
+        if self._relationships is None:
+            self._relationships = _by_id(self.contents.get('relationships'))
+
+        return self._relationships
+
+    # =========================================================================
+    #
+    #                             PUBLIC METHODS
+    #
+    # =========================================================================
+
+    def refresh(self):
+        """
+        Retrieves the blueprint contents.  The indexes are discarded only when the
+        contents have changed.
+        """
+        contents = self.blueprint.get_contents()
+        if contents is not self._contents:
+            self._contents = contents
+            self._clear()
+
+    def node(self, node_id):
+        """
+        Returns:
+            the node with ID `node_id`, or None if there is no such node
+        """
+        return self.nodes.get(node_id)
+
+    def index(self, prop):
+        """
+        Returns the index of the nodes by property `prop`, building it if needed.
+
+        Args:
+            prop (str): the node property, for example 'type'
+
+        Returns:
+            dict of property value to the list of nodes with that value; a list value
+            is indexed as a tuple, and a dict value as a frozenset of its items
+        """
+        built = self._indexes.get(prop)
+        if built is None:
+            built = defaultdict(list)
+            for node in self.nodes.values():
+                if prop in node:
+                    built[_hashable(node[prop])].append(node)
+            built = self._indexes[prop] = dict(built)
+
+        return built
+
+    def find(self, **props):
+        """
+        Returns the nodes that have all of the given property values, for example
+        `find(type='system', role='leaf')`.  The smallest of the matching index entries
+        is scanned for the other properties.
+
+        Returns:
+            list of nodes
+        """
+        if not props:
+            return list(self.nodes.values())
+
+        candidates = min((self.index(prop).get(_hashable(value), [])
+                          for prop, value in props.items()), key=len)
+
+        return [node for node in candidates
+                if all(node.get(prop) == value for prop, value in props.items())]
+
+    def by_type(self, node_type):
+        return self.index('type').get(node_type, [])
+
+    def by_role(self, role):
+        return self.index('role').get(role, [])
+
+    def by_label(self, label):
+        return self.index('label').get(label, [])
+
+    def edges(self, node_id, rel_type=None, direction='both'):
+        """
+        Returns the relationships of a node.
+
+        Args:
+            node_id (str): the node ID
+            rel_type (str): only relationships of this type
+            direction (str): 'out' for the relationships where the node is the source,
+                'in' where the node is the target, or 'both'
+
+        Returns:
+            list of (relationship, other node ID)
+        """
+        if self._adjacency is None:
+            self._build_adjacency()
+
+        found = []
+        for way in (('out', 'in') if direction == 'both' else (direction,)):
+            found.extend(self._adjacency[way].get(node_id, []))
+
+        if rel_type is not None:
+            found = [(rel, other) for rel, other in found if rel.get('type') == rel_type]
+
+        return found
+
+    def neighbors(self, node_id, rel_type=None, direction='both'):
+        """
+        Returns the nodes related to a node; see :meth:`edges` for the arguments.
+
+        Returns:
+            list of nodes
+        """
+        return [self.nodes[other] for _, other in self.edges(node_id, rel_type, direction)
+                if other in self.nodes]
+
+    # =========================================================================
+    #
+    #                             PRIVATE METHODS
+    #
+    # =========================================================================
+
+    def _clear(self):
+        self._nodes = None
+        self._relationships = None
+        self._indexes = {}
+        self._adjacency = None
+
+    def _build_adjacency(self):
+        outgoing, incoming = defaultdict(list), defaultdict(list)
+        for rel in self.relationships.values():
+            source, target = rel.get('source_id'), rel.get('target_id')
+            outgoing[source].append((rel, target))
+            incoming[target].append((rel, source))
+
+        self._adjacency = {'out': dict(outgoing), 'in': dict(incoming)}
+
+    # =========================================================================
+    #
+    #                             OPERATORS
+    #
+    # =========================================================================
+
+    def __getitem__(self, node_id):
+        return self.nodes[node_id]
+
+    def __contains__(self, node_id):
+        return node_id in self.nodes
+
+    def __len__(self):
+        return len(self.nodes)
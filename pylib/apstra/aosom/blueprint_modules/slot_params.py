@@ -8,6 +8,7 @@ from operator import itemgetter
 from copy import copy
 
 from apstra.aosom.collection_mapper import CollectionMapper
+from apstra.aosom.merge_patch import merge_patch
 from apstra.aosom.exc import SessionRqstError
 
 __all__ = ['BlueprintItemParamsCollection']
@@ -100,14 +101,19 @@ class BlueprintItemParamsItem(object):
         """
         self.write({})
 
-    def update(self, merge_value):
+    def update(self, merge_value, readback=True):
         """
         This method will issue a PATCH to the slot value so that the caller can merge the
         provided `merge_value` with the existing value.  Once the PATCH completes,
         this method with then invoke :meth:`read` to retrieve the fully updated value.
 
+        When `readback` is False, the :meth:`read` is not invoked.  If the slot value
+        was previously retrieved, the `merge_value` is merged into that local copy;
+        otherwise the read is deferred until the next access of :attr:`value`.
+
         Args:
             merge_value: data value to merge with existing slot value.
+            readback (bool): retrieve the updated value after the PATCH (default)
 
         Raises:
             SessionRqstError - if error with API request
@@ -118,7 +124,10 @@ class BlueprintItemParamsItem(object):
                 message='unable to patch slot: %s' % self.name,
                 resp=got)
 
-        self.read()
+        if readback:
+            self.read()
+        elif self._param['value'] is not None:
+            self._param['value'] = merge_patch(self._param['value'], merge_value)
 
     def __str__(self):
         return json.dumps({
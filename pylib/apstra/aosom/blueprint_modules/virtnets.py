@@ -13,3 +13,4 @@ __all__ = [
 
 class VirtualNetworks(Collection):
     URI = 'virtual-networks'
+    DEPENDENCY_RANK = 60
@@ -4,10 +4,15 @@
 # LICENSE file at http://www.apstra.com/community/eula
 
 import json
+import threading
+from os import path, listdir, remove
 
 from apstra.aosom.collection_item import CollectionItem
 from apstra.aosom.collection_mapper import CollectionMapper
-from apstra.aosom.exc import SessionRqstError, AccessValueError, NoExistsError
+from apstra.aosom.workers import run_concurrently
+from apstra.aosom.snapshot import SnapshotWriter
+from apstra.aosom.exc import (
+    SessionRqstError, AccessValueError, NoExistsError, BulkRqstError)
 
 __all__ = [
     'Collection',
@@ -86,6 +91,24 @@ class Collection(object):
 
     Item = CollectionItem
 
+    #: :data:`WRITE_PATCH` class value identifies if the collection API supports partial item
+    #: updates using PATCH.  When set, :meth:`CollectionItem.write` sends only the modified
+    #: paths of an item value.  If the AOS-server rejects the PATCH method, the collection
+    #: falls back to using PUT.
+
+    WRITE_PATCH = False
+
+    #: :data:`DEPENDENCY_RANK` class value orders collections when a :class:`UnitOfWork` is flushed.
+    #: Items of lower ranked collections are created and updated before those of higher ranked
+    #: collections, for example resource pools before blueprints; deletes are done in reverse order.
+
+    DEPENDENCY_RANK = 0
+
+    #: :data:`BACKUP_CHUNK_SIZE` is the number of bytes written at a time when streaming item
+    #: values to files with :meth:`backup`.
+
+    BACKUP_CHUNK_SIZE = 64 * 1024
+
     class ItemIter(object):
         def __init__(self, parent):
             self._parent = parent
@@ -98,7 +121,14 @@ class Collection(object):
         self.api = owner.api
         self.url = "{api}/{uri}".format(api=owner.url, uri=self.__class__.URI)
         self._cache = {}
+        self._baselines_by_id = {}
+        self._baselines_content = None
+        self._baselines_lock = threading.Lock()
+        self._version = 0
+        self._subscribers = []
+        self._mapper_tables = {}
         self.mapper = CollectionMapper(collection=self)
+        self.subscribe(CollectionMapper.on_collection_change)
 
     # =========================================================================
     #
@@ -117,6 +147,21 @@ class Collection(object):
 
         return self._cache['names']
 
+    @property
+    def version(self):
+        """
+        The collection version is incremented each time the cache changes, that is upon
+        :meth:`digest` and when items are added, updated, or removed.  This value can be
+        used to determine if data derived from the cache needs to be rebuilt.
+
+        Returns:
+            The current version (int) of the collection cache
+        """
+        if not self._cache:
+            self.digest()
+
+        return self._version
+
     @property
     def cache(self):
         """
@@ -131,6 +176,22 @@ class Collection(object):
 
         return self._cache
 
+    @property
+    def _baselines(self):
+        """
+        The item values as last obtained from, or written to, the AOS-server, by item
+        ID, apart from the cached values that the caller may modify.  These are only
+        needed to write items, so the :meth:`digest` response is parsed for them
+        upon first use rather than upon each digest.
+        """
+        with self._baselines_lock:
+            if self._baselines_content is not None:
+                content, self._baselines_content = self._baselines_content, None
+                self._baselines_by_id = {
+                    item[self.UNIQUE_ID]: item for item in json.loads(content)['items']}
+
+            return self._baselines_by_id
+
     # =========================================================================
     #
     #                             PUBLIC METHODS
@@ -151,6 +212,13 @@ class Collection(object):
 
         body = got.json()
 
+        # the response is kept for the item baselines, which are only parsed when
+        # first needed; parsing it again is much faster than copying the cached values.
+
+        with self._baselines_lock:
+            self._baselines_by_id = {}
+            self._baselines_content = got.content
+
         self._cache.clear()
         self._cache['list'] = list()
         self._cache['names'] = list()
@@ -159,10 +227,47 @@ class Collection(object):
 
         items = body['items']
         for item in items:
-            self._add_item(item)
+            self._index_item(item)
+
+        self._version += 1
+        self._notify('digest')
 
         return self._cache['by_%s' % self.LABEL]
 
+    def subscribe(self, callback):
+        """
+        Registers a function to be called each time the collection cache changes, so that
+        data derived from the cache can be updated rather than rebuilt.  The callback is
+        invoked as::
+
+            callback(collection, event, item, previous)
+
+        where `event` is one of:
+
+            * 'digest' - the cache was reloaded; `item` is None
+            * 'add' - `item` was added
+            * 'update' - `item` replaced the `previous` item datum
+            * 'remove' - `item` was removed
+
+        The `item` and `previous` values are the item datum dictionaries.
+
+        Args:
+            callback (callable): the function to call
+        """
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        """
+        Removes a function registered with :meth:`subscribe`.
+
+        Args:
+            callback (callable): the function to remove
+
+        Raises:
+            ValueError: the callback was not registered
+        """
+        self._subscribers.remove(callback)
+
     def find(self, label=None, uid=None):
         """
         Method used to find an item in the collection by either the
@@ -201,12 +306,235 @@ class Collection(object):
 
         return self[label] if label else self[as_dict[self.LABEL]]
 
+    def backup(self, dirpath=None, archive=None, names=None, max_workers=None):
+        """
+        Saves the value of each item in the collection as a JSON file.  The items are
+        retrieved from the AOS-server concurrently, and each response body is streamed
+        as-is to the file, so no item value is held in memory.  When saving to an
+        archive, each response is streamed to a temporary file that is then added to
+        the archive.  The file name is the item name with a ".json" extension.
+
+        Args:
+            dirpath (str):
+                The path to the directory to store the files.  If none provided
+                then the files are stored in the current working directory.
+
+            archive (str):
+                The path to a zip archive file to store the files in, rather
+                than in `dirpath`.
+
+            names (list):
+                The names of the items to save; all items by default.
+
+            max_workers (int):
+                The maximum number of concurrent requests.
+
+        Raises:
+            BulkRqstError: when any of the items could not be retrieved; all
+                other items are saved.
+            IOError: for any I/O related error
+
+        Returns:
+            The list of saved item names
+        """
+        by_label = self.cache['by_%s' % self.LABEL]
+        items = [by_label[name] for name in (names or self.names)]
+
+        if archive:
+            import zipfile
+            import tempfile
+
+            # each response is streamed to a temporary file, which is then
+            # added to the archive from the calling thread.
+
+            def fetch_to_temp(item):
+                with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as ofile:
+                    try:
+                        self._backup_stream(item, ofile)
+                    except Exception:
+                        ofile.close()
+                        remove(ofile.name)
+                        raise
+                    return ofile.name
+
+            def store(name, temp_path):
+                try:
+                    zipf.write(temp_path, name + '.json')
+                finally:
+                    remove(temp_path)
+
+            with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                return self._backup_items(items, max_workers, fetch=fetch_to_temp, store=store)
+
+        dirpath = dirpath or '.'
+
+        def fetch_to_file(item):
+            with open(path.join(dirpath, item[self.LABEL] + '.json'), 'wb') as ofile:
+                self._backup_stream(item, ofile)
+
+        return self._backup_items(items, max_workers, fetch=fetch_to_file)
+
+    def restore(self, dirpath=None, archive=None, max_workers=None):
+        """
+        Creates or updates the collection items from the JSON files previously
+        stored by :meth:`backup`.  The files are read as needed, and the items are
+        written to the AOS-server concurrently.  The item name is taken from the
+        item value, or from the file name if the value does not include one.
+        Items that exist are updated, others are created.
+
+        The item IDs in the files are not used, so that a backup of another
+        AOS-server can be restored.
+
+        Args:
+            dirpath (str): The path to the directory of JSON files.  If none
+                provided then the current working directory is used.
+            archive (str): The path to a zip archive file, rather than `dirpath`
+            max_workers (int): The maximum number of concurrent requests.
+
+        Raises:
+            BulkRqstError: when any of the items could not be written; all
+                other items are written.
+            IOError: for any I/O related error
+
+        Returns:
+            The list of restored item names
+        """
+        if not self._cache:
+            self.digest()
+
+        if archive:
+            import zipfile
+
+            # the archive members are read by the workers, one at a time
+
+            with zipfile.ZipFile(archive) as zipf:
+                zip_lock = threading.Lock()
+
+                def read_member(filename):
+                    with zip_lock:
+                        return zipf.read(filename)
+
+                return self._restore_items(zipf.namelist(), read_member, max_workers)
+
+        dirpath = dirpath or '.'
+
+        def read_file(filename):
+            with open(path.join(dirpath, filename)) as ifile:
+                return ifile.read()
+
+        filenames = (filename for filename in sorted(listdir(dirpath))
+                     if filename.endswith('.json'))
+
+        return self._restore_items(filenames, read_file, max_workers)
+
+    def snapshot_save(self, filepath):
+        """
+        Saves the collection digest to a compact snapshot file, with one record
+        per item keyed by the item name.  Use :class:`Snapshot` to read the file,
+        for example::
+
+            >>> aos.IpPools.snapshot_save('/tmp/ip-pools.snap')
+            >>> snap = Snapshot('/tmp/ip-pools.snap')
+            >>> snap['Switches-IpAddrs']['subnets']
+
+        Args:
+            filepath (str): the snapshot file to create
+
+        Raises:
+            IOError: for any I/O related error
+        """
+        meta = dict(kind='collection', uri=self.URI,
+                    label=self.LABEL, unique_id=self.UNIQUE_ID)
+
+        with SnapshotWriter(filepath, meta=meta) as snap:
+            for item in self.cache['list']:
+                snap.add(item[self.LABEL], item)
+
     # =========================================================================
     #
     #                             PRIVATE METHODS
     #
     # =========================================================================
 
+    def _backup_stream(self, item, ofile):
+        got = self.api.requests.get(
+            "%s/%s" % (self.url, item[self.UNIQUE_ID]), stream=True)
+
+        if not got.ok:
+            raise SessionRqstError(
+                resp=got,
+                message='unable to get item name: %s' % item[self.LABEL])
+
+        for chunk in got.iter_content(chunk_size=self.BACKUP_CHUNK_SIZE):
+            ofile.write(chunk)
+
+    def _backup_items(self, items, max_workers, fetch, store=None):
+        done, errors = [], []
+
+        for result in run_concurrently(fetch, items, max_workers):
+            if result.error:
+                errors.append(result)
+                continue
+
+            name = result.arg[self.LABEL]
+            if store:
+                store(name, result.value)
+            done.append(name)
+
+        if errors:
+            raise BulkRqstError(errors)
+
+        return done
+
+    def _restore_items(self, filenames, read, max_workers):
+        def restore_item(filename):
+            value = json.loads(read(filename))
+            item = self[value.get(self.LABEL) or path.splitext(filename)[0]]
+
+            # the backup may be of another AOS-server, so the item ID is that of
+            # the existing item, or is assigned by the AOS-server on create.
+
+            if item.exists:
+                value[self.UNIQUE_ID] = item.id
+                item._write_request(value, readback=False)
+                return item, False
+
+            value.pop(self.UNIQUE_ID, None)
+            item._create_prepare(value)
+            item._create_request()
+            return item, True
+
+        done, errors = [], []
+
+        for result in run_concurrently(restore_item, filenames, max_workers):
+            (errors if result.error else done).append(result)
+
+        # now update the collection cache, all from the calling thread
+
+        for result in done:
+            item, created = result.value
+            if created:
+                self += item
+            else:
+                self._update_item(item.datum)
+
+        if errors:
+            raise BulkRqstError(errors)
+
+        return [result.value[0].name for result in done]
+
+    def _notify(self, event, item=None, previous=None):
+        for callback in list(self._subscribers):
+            callback(self, event, item, previous)
+
+    def _index_item(self, item):
+        item_name = item[self.LABEL]
+        item_id = item[self.UNIQUE_ID]
+        self._cache['list'].append(item)
+        self._cache['names'].append(item_name)
+        self._cache['by_%s' % self.LABEL][item_name] = item
+        self._cache['by_%s' % self.UNIQUE_ID][item_id] = item
+
     def _add_item(self, item):
         """
         Add a new item to the collection.
@@ -215,12 +543,49 @@ class Collection(object):
             item (dict): the datum of the actual item.
 
         """
-        item_name = item[self.LABEL]
+        self._index_item(item)
+        self._version += 1
+        self._notify('add', item)
+
+    def _update_item(self, item):
+        """
+        Replaces the cached data of an existing item in the collection
+
+        Args:
+            item (dict): the updated datum of the item
+
+        Raises:
+            NoExistsError - if item does not exist in the collection
+        """
         item_id = item[self.UNIQUE_ID]
-        self._cache['list'].append(item)
-        self._cache['names'].append(item_name)
-        self._cache['by_%s' % self.LABEL][item_name] = item
-        self._cache['by_%s' % self.UNIQUE_ID][item_id] = item
+        by_id = self._cache['by_%s' % self.UNIQUE_ID]
+        by_label = self._cache['by_%s' % self.LABEL]
+
+        was = by_id.get(item_id)
+        if was is None:
+            raise NoExistsError('attempting to update item id (%s) not found' % item_id)
+
+        if was is item:
+            return
+
+        idx = next(i for i, li in enumerate(self._cache['list']) if li is was)
+        self._cache['list'][idx] = item
+
+        # the name is taken from the names index, as the cached value may have
+        # been modified in place before it was written.
+
+        was_name, item_name = self._cache['names'][idx], item[self.LABEL]
+        if was[self.LABEL] != was_name:
+            was = dict(was, **{self.LABEL: was_name})
+
+        if was_name != item_name:
+            del by_label[was_name]
+            self._cache['names'][idx] = item_name
+
+        by_label[item_name] = item
+        by_id[item_id] = item
+        self._version += 1
+        self._notify('update', item, was)
 
     def _remove_item(self, item):
         """
@@ -246,6 +611,9 @@ class Collection(object):
 
         del self._cache['by_%s' % self.LABEL][item_name]
         del self._cache['by_%s' % self.UNIQUE_ID][item_id]
+        self._baselines.pop(item_id, None)
+        self._version += 1
+        self._notify('remove', item)
 
     # =========================================================================
     #
@@ -257,7 +625,7 @@ class Collection(object):
         if not self._cache:
             self.digest()
 
-        return bool(item_name in self._cache.get('names'))
+        return bool(item_name in self._cache['by_%s' % self.LABEL])
 
     def __getitem__(self, item_name):
         if not self._cache:
@@ -4,11 +4,12 @@
 # LICENSE file at http://www.apstra.com/community/eula
 
 from os import path
-from copy import copy
+from copy import copy, deepcopy
 import json
 
 
 from apstra.aosom.exc import SessionRqstError, NoExistsError, DuplicateError
+from apstra.aosom.merge_patch import merge_diff, merge_patch
 
 
 # #############################################################################
@@ -27,6 +28,8 @@ class CollectionItem(object):
         * :attr:`name` - the user provided item name
         * :attr:`api` - the instance to the :mod:`Session.Api` instance.
 
+    The collection keeps a copy of the item value as last obtained from, or written
+    to, the AOS-server so that :meth:`write` can determine what has changed.
     """
     def __init__(self, collection, name, datum):
         self.name = name
@@ -118,31 +121,82 @@ class CollectionItem(object):
         """
         self.delete()
 
+    # -------------------------------------------------------------------------
+    # PROPERTY: _snapshot
+    # -------------------------------------------------------------------------
+
+    @property
+    def _snapshot(self):
+        """
+        The item value as last obtained from, or written to, the AOS-server; `None`
+        when not known.  This is kept by the collection, by item ID, so that it is
+        shared by all instances of the item.
+        """
+        item_id = self.datum.get(self.collection.UNIQUE_ID) if self.datum else None
+        return self.collection._baselines.get(item_id)
+
+    @_snapshot.setter
+    def _snapshot(self, value):
+        item_id = value.get(self.collection.UNIQUE_ID) if isinstance(value, dict) else None
+        if item_id is not None:
+            self.collection._baselines[item_id] = deepcopy(value)
+
+    # -------------------------------------------------------------------------
+    # PROPERTY: changes
+    # -------------------------------------------------------------------------
+
+    @property
+    def changes(self):
+        """
+        Property accessor for the local modifications made to the item value
+        since it was last obtained from the AOS-server.
+
+        Returns:
+            - the merge-patch dictionary of modified paths; empty if nothing changed
+            - `None` if the changes cannot be expressed as a merge-patch
+        """
+        try:
+            return merge_diff(self._snapshot, self.datum)
+        except ValueError:
+            return None
+
     # =========================================================================
     #
     #                             PUBLIC METHODS
     #
     # =========================================================================
 
-    def write(self, value=None):
+    def write(self, value=None, readback=True):
         """
         Used to write the item value back to the AOS-server.
 
+        Only the changes made since the value was obtained from the AOS-server are
+        written.  If nothing has changed then no request is made.  If the collection
+        supports partial updates (see :attr:`Collection.WRITE_PATCH`) then a PATCH
+        with only the modified paths is sent, otherwise the complete value is PUT.
+
+        If the AOS-server returns the updated item in the response, then that
+        is used as the new item value and no additional GET is made.  The collection
+        cache is updated with the new item value.
+
+        Args:
+            value (dict):
+                the new item value; if not provided then the current
+                :attr:`value` is written.
+
+            readback (bool):
+                when True (default), the item value is retrieved from the
+                AOS-server after the update.  When False, the value written
+                becomes the local item value instead, saving the round trip.
+
         Raises:
             SessionRqstError: upon HTTP request issue
         """
         if not self.exists:
             return self.create(value=value)
 
-        got = self.api.requests.put(
-            self.url, json=value or self.datum)
-
-        if not got.ok:
-            raise SessionRqstError(
-                message='unable to update: %s' % got.reason,
-                resp=got)
-
-        self.read()
+        if self._write_request(value, readback):
+            self._update_collection()
 
     def read(self):
         """
@@ -153,13 +207,8 @@ class CollectionItem(object):
 
         Returns: a copy of the item value, usually a :class:`dict`.
         """
-        got = self.api.requests.get(self.url)
-        if not got.ok:
-            raise SessionRqstError(
-                resp=got,
-                message='unable to get item name: %s' % self.name)
-
-        self.datum = copy(got.json())
+        self._read_request()
+        self._update_collection()
         return self.datum
 
     def create(self, value=None, replace=False):
@@ -185,46 +234,14 @@ class CollectionItem(object):
         # when this instances was instantiated from the collection; *not*
         # from the `value` data.
 
-        def throw_duplicate(name):
-            raise DuplicateError("'{}' already exists in collection: {}.".format(
-                name, self.collection.URI))
-
         if self.exists:
             if not replace:
-                throw_duplicate(self.name)
+                self._raise_duplicate(self.name)
 
             self.delete()
 
-        # the caller can either pass the new data to this method, or they
-        # could have already assigned it into the :prop:`datum`.  This
-        # latter approach should be discouraged.
-
-        if value is not None:
-            self.datum = copy(value)
-
-        # now check to see if the new value/name exists.  if the datum
-        # does not include the lable value, we need to auto-set it from
-        # the instance name value.
-
-        new_name = self.datum.get(self.collection.LABEL)
-        if not new_name:
-            self.datum[self.collection.LABEL] = self.name
-
-        if new_name in self.collection:
-            throw_duplicate(new_name)
-
-        # at this point we should be good to execute the POST and
-        # create the new item in the server
-
-        got = self.api.requests.post(self.collection.url, json=self.datum)
-
-        if not got.ok:
-            raise SessionRqstError(
-                message='unable to create: %s' % got.reason,
-                resp=got)
-
-        body = got.json()
-        self.datum[self.collection.UNIQUE_ID] = body[self.collection.UNIQUE_ID]
+        self._create_prepare(value)
+        self._create_request()
 
         # now add this item to the parent collection so it can be used by other
         # invocations
@@ -240,12 +257,7 @@ class CollectionItem(object):
             SessionRqstError - when API error
             NoExistsError - when item does not actually exist
         """
-        got = self.api.requests.delete(self.url)
-        if not got.ok:
-            raise SessionRqstError(
-                message='unable to delete item: %s' % got.reason,
-                resp=got)
-
+        self._delete_request()
         self.collection -= self
 
     def jsonfile_save(self, dirpath=None, filename=None, indent=3):
@@ -268,7 +280,8 @@ class CollectionItem(object):
             IOError: for any I/O related error
         """
         ofpath = path.join(dirpath or '.', filename or self.name) + '.json'
-        json.dump(self.value, open(ofpath, 'w+'), indent=indent)
+        with open(ofpath, 'w+') as ofile:
+            json.dump(self.value, ofile, indent=indent)
 
     def jsonfile_load(self, filepath):
         """
@@ -280,7 +293,191 @@ class CollectionItem(object):
         Raises:
             IOError: for any I/O related error
         """
-        self.datum = json.load(open(filepath))
+        with open(filepath) as ifile:
+            self.datum = json.load(ifile)
+
+    # =========================================================================
+    #
+    #                             PRIVATE METHODS
+    #
+    # =========================================================================
+
+    def _raise_duplicate(self, name):
+        raise DuplicateError("'{}' already exists in collection: {}.".format(
+            name, self.collection.URI))
+
+    def _write_request(self, value=None, readback=True):
+        """
+        Executes the PATCH or PUT of the item changes in the AOS-server.  The
+        collection cache is not updated; that is left to the caller.
+
+        Returns:
+            True if the item was written, False if there was nothing to write
+
+        Raises:
+            SessionRqstError: upon HTTP request issue
+        """
+        new_value = value or self.datum
+
+        try:
+            patch = merge_diff(self._snapshot, new_value)
+        except ValueError:
+            patch = None
+
+        if patch == {}:
+            return False
+
+        got = None
+        if patch and self.collection.WRITE_PATCH:
+            got = self.api.requests.patch(self.url, json=patch)
+            if got.status_code in (405, 501):
+                # the endpoint does not support PATCH; use PUT from now on
+                self.collection.WRITE_PATCH = False
+                got = None
+
+        if got is None:
+            patch = None
+            got = self.api.requests.put(
+                self.url, json=new_value)
+
+        if not got.ok:
+            raise SessionRqstError(
+                message='unable to update: %s' % got.reason,
+                resp=got)
+
+        updated = self._updated_from_resp(got)
+        if updated:
+            self.datum = updated
+        elif readback:
+            self._read_request()
+            return True
+        elif patch:
+            self.datum = merge_patch(self._snapshot, patch)
+        else:
+            # a PUT replaces the complete value
+            self.datum = copy(new_value)
+
+        self._snapshot = deepcopy(self.datum)
+        return True
+
+    def _read_request(self):
+        """
+        Executes the GET of the item value from the AOS-server.  The collection
+        cache is not updated; that is left to the caller.
+
+        Raises:
+            SessionRqstError: upon HTTP request issue
+        """
+        got = self.api.requests.get(self.url)
+        if not got.ok:
+            raise SessionRqstError(
+                resp=got,
+                message='unable to get item name: %s' % self.name)
+
+        self.datum = copy(got.json())
+        self._snapshot = deepcopy(self.datum)
+
+    def _update_collection(self):
+        """
+        Replaces the item value held by the collection cache with this item value,
+        so that the collection, its subscribers and other instances of the item
+        see the value as last written to, or obtained from, the AOS-server.
+        """
+        if not self.exists:
+            return
+
+        self.collection._update_item(self.datum)
+        self.name = self.datum.get(self.collection.LABEL, self.name)
+
+    def _create_prepare(self, value=None):
+        """
+        Sets up the item value for a create, without making any request.
+
+        Args:
+            value (dict): the new item value; if not provided the current
+                :attr:`value` is used.
+
+        Raises:
+            DuplicateError: the item label already exists in the collection
+        """
+
+        # the caller can either pass the new data to this method, or they
+        # could have already assigned it into the :prop:`datum`.  This
+        # latter approach should be discouraged.
+
+        if value is not None:
+            self.datum = copy(value)
+
+        # now check to see if the new value/name exists.  if the datum
+        # does not include the lable value, we need to auto-set it from
+        # the instance name value.
+
+        new_name = self.datum.get(self.collection.LABEL)
+        if not new_name:
+            self.datum[self.collection.LABEL] = self.name
+
+        if new_name in self.collection:
+            self._raise_duplicate(new_name)
+
+    def _create_request(self):
+        """
+        Executes the POST to create the item in the AOS-server.  The collection
+        cache is not updated; that is left to the caller.
+
+        Raises:
+            SessionRqstError: upon HTTP request issue
+        """
+        got = self.api.requests.post(self.collection.url, json=self.datum)
+
+        if not got.ok:
+            raise SessionRqstError(
+                message='unable to create: %s' % got.reason,
+                resp=got)
+
+        body = got.json()
+        self.datum[self.collection.UNIQUE_ID] = body[self.collection.UNIQUE_ID]
+        self._snapshot = deepcopy(self.datum)
+
+    def _delete_request(self):
+        """
+        Executes the DELETE of the item in the AOS-server.  The collection
+        cache is not updated; that is left to the caller.
+
+        Raises:
+            SessionRqstError: upon HTTP request issue
+            NoExistsError: when item does not actually exist
+        """
+        got = self.api.requests.delete(self.url)
+        if not got.ok:
+            raise SessionRqstError(
+                message='unable to delete item: %s' % got.reason,
+                resp=got)
+
+    def _updated_from_resp(self, got):
+        """
+        Returns the updated item value from a write response, if the AOS-server
+        provided one.
+
+        Args:
+            got: the :class:`requests.Response` from the write request
+
+        Returns:
+            - the item value (dict) when the response body is the updated item
+            - `None` otherwise
+        """
+        try:
+            body = got.json()
+        except ValueError:
+            return None
+
+        if not isinstance(body, dict):
+            return None
+
+        if body.get(self.collection.UNIQUE_ID) != self.id or \
+                self.collection.LABEL not in body:
+            return None
+
+        return copy(body)
 
     def __str__(self):
         return json.dumps({
@@ -3,14 +3,114 @@
 # This source code is licensed under End User License Agreement found in the
 # LICENSE file at http://www.apstra.com/community/eula
 
-from apstra.aosom.exc import AccessValueError
+from apstra.aosom.exc import AccessValueError, BulkRqstError
+from apstra.aosom.workers import run_concurrently
 
 __all__ = [
     'CollectionMapper',
-    'MultiCollectionMapper'
+    'MultiCollectionMapper',
+    'PathSpec'
 ]
 
 
+class PathSpec(object):
+    """
+    A PathSpec is a compiled set of paths into a nested data structure, for example a
+    blueprint parameter payload, identifying the values that are to be transformed.
+    Each path is a dot separated list of tokens:
+
+        * a dictionary key, for example "links"
+        * a list index, for example "0"
+        * the wildcard "*", which matches every list element or dictionary value
+
+    For example, given the payload:
+
+        # {'links': [{'pool_id': '65dfbc77-...', 'asns': ['0310d821-...']}]}
+
+    the paths "links.*.pool_id" and "links.*.asns" identify the values to transform.  If the
+    value found at a path is a list, each of its elements is transformed.  Paths that are not
+    present in the data are ignored.
+
+    The paths are compiled once into a tree, so that :meth:`apply` transforms all of the
+    paths in a single traversal of the data.
+    """
+    WILDCARD = '*'
+
+    class Node(object):
+        def __init__(self):
+            self.children = {}
+            self.tag = None
+
+    def __init__(self, paths):
+        """
+        Args:
+            paths: either a list of path strings, or a dict of path string to a tag value.
+             The tag is given to the transform function; see :meth:`apply`.
+
+        Raises:
+            AccessValueError: a path is also the prefix of another path
+        """
+        self.paths = paths
+        self._root = self.Node()
+
+        tagged = paths.items() if isinstance(paths, dict) else ((_path, None) for _path in paths)
+        for _path, tag in tagged:
+            self._compile(_path, tag)
+
+    def apply(self, data, transform):
+        """
+        Transforms the values at each of the paths.  The `data` is not modified;
+        the containers along the matched paths are copied, all others are shared.
+
+        Args:
+            data: the nested data structure
+            transform (callable): called as transform(tag, value) for each value found,
+             returning the new value.
+
+        Returns:
+            The transformed data structure
+        """
+        return self._apply(self._root, data, transform)
+
+    def _compile(self, _path, tag):
+        node = self._root
+        for token in _path.split('.'):
+            if node.tag is not None:
+                raise AccessValueError(message='path spec conflict at: %s' % _path)
+            node = node.children.setdefault(token, self.Node())
+
+        if node.children:
+            raise AccessValueError(message='path spec conflict at: %s' % _path)
+
+        node.tag = tag if tag is not None else _path
+
+    def _apply(self, node, data, transform):
+        if not node.children:
+            if isinstance(data, list):
+                return [transform(node.tag, each) for each in data]
+            return transform(node.tag, data)
+
+        wildcard = node.children.get(self.WILDCARD)
+
+        if isinstance(data, dict):
+            result = dict(data)
+            for key, value in data.items():
+                child = node.children.get(key) or wildcard
+                if child and value is not None:
+                    result[key] = self._apply(child, value, transform)
+            return result
+
+        if isinstance(data, list):
+            result = list(data)
+            for idx, value in enumerate(data):
+                child = node.children.get(str(idx)) or wildcard
+                if child and value is not None:
+                    result[idx] = self._apply(child, value, transform)
+            return result
+
+        return data
+
+
 class CollectionMapper(object):
     """
     A CollectionMapper is used to map a collection item's unique-ID value (used by AOS)
@@ -66,74 +166,259 @@ class CollectionMapper(object):
         self._read_item = read_item or collection.LABEL
         self._write_given = write_given or collection.LABEL
         self._write_item = write_item or collection.UNIQUE_ID
+        self._specs = {}
+
+    # =========================================================================
+    #
+    #                             PUBLIC METHODS
+    #
+    # =========================================================================
+
+    def translate_uids(self, values):
+        """
+        Transforms a batch of native API stored values, i.e. unique-id, into the
+        human "label" values.
+
+        Args:
+            values (iterable): the unique-id values
+
+        Returns:
+            (list): the label values, in the same order as `values`
+
+        Raises:
+            AccessValueError: a value is not found in the collection
+        """
+        return self._translate(self._lookup_tables()[0], values, self._read_given)
+
+    def translate_labels(self, values):
+        """
+        Transforms a batch of human "label" values into the native API stored
+        values, i.e. unique-id.
+
+        Args:
+            values (iterable): the label values
+
+        Returns:
+            (list): the unique-id values, in the same order as `values`
 
-    def from_uid(self, items):
+        Raises:
+            AccessValueError: a value is not found in the collection
+        """
+        return self._translate(self._lookup_tables()[1], values, self._write_given)
+
+    def from_uid(self, items, paths=None):
         """
         Transforms the native API stored value, i.e. unique-id, into something human "label value,
         i.e., 'display-name'.
 
         Args:
             items (dict): key is user defined, value is a string or collection of strings
+            paths: optional :class:`PathSpec`, or list of path strings, identifying the values
+             to transform within a nested `items` structure
 
         Returns:
             (dict): same key found in items, value is transformed values
         """
+        if paths:
+            return self._from_paths(self._lookup_tables()[0], items, paths, self._read_given)
 
-        def lookup(lookup_value):
-            item = self.collection.find(uid=lookup_value)
-            if not item:
-                raise AccessValueError(
-                    message='unable to find item key=%s, by=%s' %
-                            (lookup_value, self._write_given))
-
-            return item.value[self._read_item]
+        return self._from_items(self.translate_uids, items)
 
-        return {
-            _key: map(lookup, _val) if isinstance(_val, (list, dict)) else lookup(_val)
-            for _key, _val in items.items()
-        }
-
-    def from_label(self, items):
+    def from_label(self, items, paths=None):
         """
         Transforms the human "label value, i.e., 'display-name', to the native API stored value,
         i.e. unique-id, into something
 
         Args:
             items (dict): key is user defined, value is a string or collection of strings
+            paths: optional :class:`PathSpec`, or list of path strings, identifying the values
+             to transform within a nested `items` structure
 
         Returns:
             (dict): same key found in items, value is transformed values
         """
-        def lookup(lookup_value):
-            item = self.collection.find(label=lookup_value)
-            if not item:
-                raise AccessValueError(
-                    message='unable to find item key=%s, by=%s' %
-                            (lookup_value, self._write_given))
+        if paths:
+            return self._from_paths(self._lookup_tables()[1], items, paths, self._write_given)
 
-            return item.value[self._write_item]
+        return self._from_items(self.translate_labels, items)
+
+    @staticmethod
+    def on_collection_change(collection, event, item, previous):
+        """
+        Collection subscriber callback (see :meth:`Collection.subscribe`) that keeps the
+        collection lookup tables current.  An added, updated or removed item changes only
+        the table entries of that item; the tables are rebuilt on next use after a digest.
+        """
+        if event == 'digest':
+            collection._mapper_tables.clear()
+            return
 
+        for (read_given, read_item, write_given, write_item), tables in \
+                collection._mapper_tables.items():
+            forward, reverse = tables
+
+            if event in ('update', 'remove'):
+                stale = previous if event == 'update' else item
+                forward.pop(stale.get(read_given), None)
+                reverse.pop(stale.get(write_given), None)
+
+            if event in ('add', 'update'):
+                forward[item[read_given]] = item[read_item]
+                reverse[item[write_given]] = item[write_item]
+
+    # =========================================================================
+    #
+    #                             PRIVATE METHODS
+    #
+    # =========================================================================
+
+    def _lookup_tables(self):
+        """
+        Returns the forward (uid to label) and reverse (label to uid) lookup dictionaries.
+        These are stored with the collection so that they are shared by all mappers of the
+        same collection, and are kept up to date by :meth:`on_collection_change`.
+        """
+        key = (self._read_given, self._read_item, self._write_given, self._write_item)
+
+        items = self.collection.cache['list']
+        tables = self.collection._mapper_tables.get(key)
+        if tables is None:
+            tables = self.collection._mapper_tables[key] = (
+                {item[self._read_given]: item[self._read_item] for item in items},
+                {item[self._write_given]: item[self._write_item] for item in items})
+
+        return tables
+
+    @staticmethod
+    def _translate(table, values, by):
+        try:
+            return [table[value] for value in values]
+        except KeyError as exc:
+            raise AccessValueError(
+                message='unable to find item key=%s, by=%s' % (exc.args[0], by))
+
+    def _from_paths(self, table, items, paths, by):
+        def transform(_, value):
+            return self._translate(table, [value], by)[0]
+
+        return self._compiled(paths).apply(items, transform)
+
+    def _compiled(self, paths):
+        """
+        Returns the compiled :class:`PathSpec` for `paths`, compiling each distinct
+        list of paths only once.
+        """
+        if isinstance(paths, PathSpec):
+            return paths
+
+        key = tuple(paths)
+        spec = self._specs.get(key)
+        if not spec:
+            spec = self._specs[key] = PathSpec(paths)
+
+        return spec
+
+    @staticmethod
+    def _from_items(translate, items):
         return {
-            _key: map(lookup, _val) if isinstance(_val, (list, dict)) else lookup(_val)
+            _key: translate(_val) if isinstance(_val, (list, dict)) else translate([_val])[0]
             for _key, _val in items.items()
         }
 
 
 class MultiCollectionMapper(object):
-    def __init__(self, session, xf_map):
+    """
+    A MultiCollectionMapper is used to map values of different ID types, each backed by a
+    different collection.  The `xf_map` identifies the session collection for each ID type
+    name, for example:
+
+        # >>> xfm = MultiCollectionMapper(aos, dict(ip_items='IpPools', asn_items='AsnPools'))
+        # >>> xfm.from_uid(dict(ip_items=[...], asn_items=[...]))
+
+    When transforming a nested structure, the `paths` argument is a dict of path string to
+    the ID type name, for example:
+
+        # >>> xfm.from_uid(payload, paths={'links.*.pool_id': 'ip_items',
+        # ...                              'links.*.asns': 'asn_items'})
+
+    The collections are retrieved from the AOS-server concurrently when the mapper
+    is created, rather than one at a time upon first use; see :meth:`warm`.
+    """
+    def __init__(self, session, xf_map, prefetch=True, max_workers=None):
+        """
+        Args:
+            session: the :class:`Session` instance
+            xf_map (dict): ID type name to session collection name
+            prefetch (bool): when True, :meth:`warm` is called
+            max_workers (int): maximum number of concurrent requests used by :meth:`warm`
+        """
         self.xfs = {
             id_name: CollectionMapper(getattr(session, id_type))
             for id_name, id_type in xf_map.items()
         }
+        self._specs = {}
+
+        if prefetch:
+            self.warm(max_workers=max_workers)
+
+    def warm(self, max_workers=None):
+        """
+        Retrieves each of the collections not already cached, concurrently, and then
+        builds the lookup tables.  Collections that are already cached are not
+        retrieved again.
+
+        Args:
+            max_workers (int): maximum number of concurrent requests
+
+        Raises:
+            BulkRqstError: when any of the collections could not be retrieved
+        """
+        collections = {id(xf.collection): xf.collection for xf in self.xfs.values()}
+        stale = [each for each in collections.values() if not each._cache]
+
+        errors = [result for result in run_concurrently(
+            lambda collection: collection.digest(), stale, max_workers)
+            if result.error]
+
+        if errors:
+            raise BulkRqstError(errors)
+
+        for xf in self.xfs.values():
+            xf._lookup_tables()
+
+    def from_uid(self, values, paths=None):
+        if paths:
+            return self._from_paths(values, paths, reverse=False)
 
-    def from_uid(self, values):
         retval = {}
         for id_name, id_value in values.items():
             retval.update(self.xfs[id_name].from_uid({id_name: id_value}))
         return retval
 
-    def from_label(self, values):
+    def from_label(self, values, paths=None):
+        if paths:
+            return self._from_paths(values, paths, reverse=True)
+
         retval = {}
         for id_name, id_value in values.items():
             retval.update(self.xfs[id_name].from_label({id_name: id_value}))
         return retval
+
+    def _from_paths(self, values, paths, reverse):
+        if not isinstance(paths, PathSpec):
+            key = tuple(sorted(paths.items()))
+            if key not in self._specs:
+                self._specs[key] = PathSpec(paths)
+            paths = self._specs[key]
+
+        tables = {}
+        for id_name, xf in self.xfs.items():
+            forward, backward = xf._lookup_tables()
+            tables[id_name] = (
+                (backward, xf._write_given) if reverse else (forward, xf._read_given))
+
+        def transform(id_name, value):
+            table, by = tables[id_name]
+            return CollectionMapper._translate(table, [value], by)[0]
+
+        return paths.apply(values, transform)
@@ -0,0 +1,226 @@
+# Copyright 2014-present, Apstra, Inc. All rights reserved.
+#
+# This source code is licensed under End User License Agreement found in the
+# LICENSE file at http://www.apstra.com/community/eula
+
+"""
+Columnar views of device service data.  The service items of many devices, for example
+the results of :meth:`DeviceManager.fetch_services`, are converted into one column per
+field so that aggregations and filters can be done a column at a time.  For example::
+
+    table = service_table(aos.Devices.fetch_services('interface'),
+                          fields=['interface', 'counters.rx_bytes'])
+
+    # with NumPy installed
+    busy = table.select(table['counters.rx_bytes'] > 10 ** 9)
+    print busy['device'], busy['interface']
+
+When NumPy is installed, the columns are NumPy arrays; numeric columns are otherwise
+stored in :class:`array.array` and all other columns in lists.
+"""
+
+from array import array
+from collections import OrderedDict
+from itertools import compress
+from numbers import Integral, Real
+
+__all__ = [
+    'ColumnTable',
+    'service_table'
+]
+
+#: the column of device names
+DEVICE_FIELD = 'device'
+
+#: the column of service names
+SERVICE_FIELD = 'service'
+
+
+def _numpy():
+    try:
+        import numpy
+        return numpy
+    except ImportError:
+        return None
+
+
+def _get_path(item, field):
+    value = item
+    for key in field.split('.'):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def _scalar_fields(item, prefix=''):
+    for key, value in item.items():
+        if isinstance(value, dict):
+            for field in _scalar_fields(value, prefix + key + '.'):
+                yield field
+        elif not isinstance(value, list):
+            yield prefix + key
+
+
+def _column_kind(values):
+    """
+    Returns the column kind: 'i' for integers, 'f' for numbers, 'b' for booleans,
+    or 'o' for anything else.  None values are allowed in numeric columns.
+    """
+    present = [value for value in values if value is not None]
+    if not present:
+        return 'o'
+
+    if all(isinstance(value, bool) for value in present):
+        return 'b' if len(present) == len(values) else 'o'
+
+    if any(isinstance(value, bool) for value in present):
+        return 'o'
+
+    if all(isinstance(value, Integral) for value in present):
+        return 'i' if len(present) == len(values) else 'f'
+
+    if all(isinstance(value, Real) for value in present):
+        return 'f'
+
+    return 'o'
+
+
+def _make_column(values, numpy):
+    kind = _column_kind(values)
+
+    if kind == 'f':
+        values = [float('nan') if value is None else value for value in values]
+
+    if numpy is not None:
+        if kind != 'o':
+            return numpy.array(values, dtype=dict(i='int64', f='float64', b='bool')[kind])
+
+        # assigned one at a time so that list values are not taken as dimensions
+
+        column = numpy.empty(len(values), dtype='object')
+        for idx, value in enumerate(values):
+            column[idx] = value
+        return column
+
+    if kind == 'i':
+        return array('l', values)
+
+    if kind == 'f':
+        return array('d', values)
+
+    return list(values)
+
+
+class ColumnTable(object):
+    """
+    A table of named, equal length, columns.  The public attributes are:
+
+        * :attr:`columns` - the ordered dictionary of field name to column
+        * :attr:`numpy` - True when the columns are NumPy arrays
+    """
+    def __init__(self, columns, numpy=False):
+        self.columns = columns
+        self.numpy = numpy
+
+    @property
+    def fields(self):
+        return list(self.columns)
+
+    def select(self, mask):
+        """
+        Returns a new table with only the rows where `mask` is true.
+
+        Args:
+            mask: a boolean value for each row; a boolean NumPy array or any iterable
+
+        Returns:
+            a new :class:`ColumnTable`
+        """
+        if self.numpy:
+            return ColumnTable(OrderedDict(
+                (field, column[mask]) for field, column in self.columns.items()), numpy=True)
+
+        mask = list(mask)
+        selected = OrderedDict()
+        for field, column in self.columns.items():
+            values = list(compress(column, mask))
+            selected[field] = array(column.typecode, values) if isinstance(column, array) else values
+
+        return ColumnTable(selected)
+
+    def to_records(self):
+        """
+        Returns:
+            the table as a NumPy structured array, with one record per row
+
+        Raises:
+            ImportError: NumPy is not installed
+        """
+        numpy = _numpy()
+        if numpy is None:
+            raise ImportError('NumPy is required for to_records()')
+
+        columns = [numpy.asarray(column) for column in self.columns.values()]
+        records = numpy.empty(len(self), dtype=[
+            (str(field), column.dtype) for field, column in zip(self.columns, columns)])
+
+        for field, column in zip(self.columns, columns):
+            records[str(field)] = column
+
+        return records
+
+    def __getitem__(self, field):
+        return self.columns[field]
+
+    def __contains__(self, field):
+        return field in self.columns
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+
+def service_table(results, fields=None, use_numpy=None):
+    """
+    Converts device service results into a :class:`ColumnTable`, with one row per
+    service item.  The table includes the :data:`DEVICE_FIELD` column of device names
+    and the :data:`SERVICE_FIELD` column of service names.
+
+    Args:
+        results: iterable of :data:`ServiceResult`, or (device, service, items) tuples.
+            Results with an error are skipped.
+        fields (list): the item fields to include; nested values are identified by a
+            dot separated path, e.g. 'counters.rx_bytes'.  Defaults to all of the
+            non-list values found in the items.  A missing value is `None`, or NaN
+            in a numeric column.
+        use_numpy (bool): use NumPy arrays; defaults to True when NumPy is installed
+
+    Returns:
+        a :class:`ColumnTable`
+    """
+    numpy = _numpy() if use_numpy is not False else None
+    if use_numpy and numpy is None:
+        raise ImportError('NumPy is not installed')
+
+    devices, services, items = [], [], []
+    for result in results:
+        if getattr(result, 'error', None) is not None:
+            continue
+
+        device, service, result_items = result[:3]
+        for item in result_items or []:
+            devices.append(getattr(device, 'name', device))
+            services.append(service)
+            items.append(item)
+
+    if fields is None:
+        fields = sorted(set(field for item in items for field in _scalar_fields(item)))
+
+    columns = OrderedDict()
+    columns[DEVICE_FIELD] = _make_column(devices, numpy)
+    columns[SERVICE_FIELD] = _make_column(services, numpy)
+
+    for field in fields:
+        columns[field] = _make_column([_get_path(item, field) for item in items], numpy)
+
+    return ColumnTable(columns, numpy=numpy is not None)
@@ -12,18 +12,39 @@ __all__ = [
 ]
 
 
+class LazyCatalogAttr(object):
+    """
+    Class attribute whose value is obtained from the dynamic module catalog when first
+    accessed, rather than when the owner class is created.  This keeps the catalog (and its
+    package) from being imported as a side-effect of importing the owner class module.
+    """
+    def __init__(self, dmdir, name, getter):
+        self.dmdir = dmdir
+        self.name = name
+        self.getter = getter
+
+    def __get__(self, obj, objtype=None):
+        catmod = importlib.import_module("%s.catalog" % self.dmdir, package=__package__)
+        value = self.getter(catmod)
+
+        # replace this descriptor with the value so that the catalog is only
+        # consulted once
+
+        setattr(objtype or type(obj), self.name, value)
+        return value
+
+
 class TypeDynamicModuleCatalog(type):
 
     def __new__(mcs, clsname, supers, clsdict):
         if 'DYNMODULEDIR' in clsdict:
             dmdir = clsdict['DYNMODULEDIR']
 
-            clsdict['_aos_dynamic_module_'] = importlib.import_module(
-                "%s.catalog" % dmdir, package=__package__)
-
-            catmod = getattr(clsdict['_aos_dynamic_module_'], 'AosModuleCatalog')
-            clsdict['_aos_dynamic_catalog_'] = catmod
-            clsdict['ModuleCatalog'] = catmod.keys()
+            for name, getter in (
+                    ('_aos_dynamic_module_', lambda catmod: catmod),
+                    ('_aos_dynamic_catalog_', lambda catmod: catmod.AosModuleCatalog),
+                    ('ModuleCatalog', lambda catmod: catmod.AosModuleCatalog.keys())):
+                clsdict[name] = LazyCatalogAttr(dmdir, name, getter)
 
         return type.__new__(mcs, clsname, supers, clsdict)
 
@@ -13,6 +13,18 @@ class AosOmError(Exception):
         super(AosOmError, self).__init__(message)
 
 
+# ##### ---------------------------------------------------
+# ##### Snapshot file exceptions
+# ##### ---------------------------------------------------
+
+class SnapshotFormatError(AosOmError):
+    """
+    The file is not a valid snapshot file.
+    """
+    def __init__(self, message=None):
+        super(SnapshotFormatError, self).__init__(message)
+
+
 # ##### ---------------------------------------------------
 # ##### Login related exceptions
 # ##### ---------------------------------------------------
@@ -84,3 +96,37 @@ class DuplicateError(SessionError):
     """
     def __init__(self, message=None):
         super(DuplicateError, self).__init__(message)
+
+
+class WaitTimeoutError(SessionError):
+    """
+    A wait for the AOS-server to reach an expected condition did
+    not complete within the given timeout.
+    """
+    def __init__(self, message=None):
+        super(WaitTimeoutError, self).__init__(message)
+
+
+class BulkRqstError(SessionError):
+    """
+    One or more of the requests of a bulk operation failed.  The :attr:`errors`
+    is the list of failed requests and their exceptions.
+    """
+    def __init__(self, errors, message=None):
+        self.errors = errors
+        super(BulkRqstError, self).__init__(
+            message or '%d request(s) failed' % len(errors))
+
+
+class FlushError(BulkRqstError):
+    """
+    One or more of the queued operations failed when flushing a
+    unit-of-work.  The :attr:`errors` is the list of failed operations
+    and their exceptions.  The :attr:`not_attempted` is the list of queued
+    operations that were not executed because of the failures; these
+    remain queued.
+    """
+    def __init__(self, errors, not_attempted=None, message=None):
+        self.not_attempted = not_attempted or []
+        super(FlushError, self).__init__(
+            errors, message or '%d queued operation(s) failed' % len(errors))
@@ -0,0 +1,85 @@
+# Copyright 2014-present, Apstra, Inc. All rights reserved.
+#
+# This source code is licensed under End User License Agreement found in the
+# LICENSE file at http://www.apstra.com/community/eula
+
+"""
+Helpers for JSON merge-patch (RFC 7386) style values.  These are used to keep
+local copies of item values in sync after a partial update without having to
+re-read the value from the AOS-server.
+"""
+
+from copy import deepcopy
+
+__all__ = [
+    'merge_patch',
+    'merge_diff'
+]
+
+
+def merge_patch(target, patch):
+    """
+    Applies the `patch` value onto the `target` value using JSON merge-patch
+    semantics: dictionaries are merged recursively, a `None` value removes the
+    key, and any other value (including lists) replaces the target value.
+
+    Args:
+        target: the original value; this value is not modified.
+        patch: the value to merge into `target`.
+
+    Returns:
+        A new merged value.
+    """
+    if not isinstance(patch, dict):
+        return deepcopy(patch)
+
+    merged = deepcopy(target) if isinstance(target, dict) else {}
+
+    for key, value in patch.items():
+        if value is None:
+            merged.pop(key, None)
+        else:
+            merged[key] = merge_patch(merged.get(key), value)
+
+    return merged
+
+
+def merge_diff(source, target):
+    """
+    Computes the JSON merge-patch that transforms `source` into `target`, such
+    that ``merge_patch(source, merge_diff(source, target)) == target``.  Only the
+    modified paths are included in the patch.
+
+    Args:
+        source: the original value
+        target: the modified value
+
+    Returns:
+        - the patch dictionary; an empty dictionary when nothing changed.
+
+    Raises:
+        ValueError: the change cannot be expressed as a merge-patch, for example
+            when `target` is not a dictionary, or sets a value to `None`.
+    """
+    if not isinstance(source, dict) or not isinstance(target, dict):
+        raise ValueError('merge-patch requires dictionary values')
+
+    patch = {}
+
+    for key in source:
+        if key not in target:
+            patch[key] = None
+
+    for key, value in target.items():
+        if key in source and source[key] == value:
+            continue
+
+        if value is None:
+            raise ValueError("merge-patch cannot set '%s' to null" % key)
+
+        if isinstance(value, dict) and isinstance(source.get(key), dict):
+            patch[key] = merge_diff(source[key], value)
+        else:
+            patch[key] = deepcopy(value)
+
+    return patch
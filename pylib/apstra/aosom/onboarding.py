@@ -0,0 +1,199 @@
+# Copyright 2014-present, Apstra, Inc. All rights reserved.
+#
+# This source code is licensed under End User License Agreement found in the
+# LICENSE file at http://www.apstra.com/community/eula
+
+"""
+Bringing many devices into service at once: waiting for the devices to be known
+by the AOS-server, approving them, and waiting for them to become active.
+"""
+
+import time
+import threading
+from collections import namedtuple
+
+from apstra.aosom.exc import SessionError, BulkRqstError, WaitTimeoutError
+from apstra.aosom.polling import Backoff
+from apstra.aosom.session_modules.devices import DeviceItem
+
+__all__ = [
+    'OnboardingPipeline',
+    'OnboardResult'
+]
+
+#: the outcome of onboarding one device
+#:   * `name` - the device name, i.e. the device key
+#:   * `state` - the last known management state, `None` if the device was never seen
+#:   * `timing` - dictionary of the time, in seconds from the pipeline start, each stage
+#:     was reached: 'discovered', 'approved', 'active'
+#:   * `error` - the exception when the device could not be onboarded, otherwise `None`
+
+OnboardResult = namedtuple('OnboardResult', ['name', 'state', 'timing', 'error'])
+
+
+class OnboardingPipeline(object):
+    """
+    The OnboardingPipeline onboards many devices concurrently.  Each poll retrieves
+    the state of all devices with one request.  New quarantined devices are approved
+    together using :meth:`DeviceManager.approve_many`, and each device is followed until
+    it becomes active.  For example::
+
+        pipeline = OnboardingPipeline(aos.Devices, expected=rack_device_keys,
+                                      location=lambda dev: inventory[dev.name])
+
+        for result in pipeline.run():
+            print result.name, result.error or result.timing['active']
+
+    The polling is adaptive, using a :class:`Backoff`: the interval starts at
+    `min_interval` and doubles, up to `max_interval`, after each poll in which no device
+    made progress.  Once a device makes progress, the interval returns to `min_interval`.
+    """
+
+    #: :data:`ACTIVE` is the management state of a device in service
+    ACTIVE = 'IS-ACTIVE'
+
+    def __init__(self, devices, expected=None, location=None, batch_size=48,
+                 max_workers=None, min_interval=1.0, max_interval=15.0, timeout=600):
+        """
+        Args:
+            devices: the :class:`DeviceManager` instance, i.e. `aos.Devices`
+            expected (list): the device names to onboard.  When not provided, the devices
+                that are quarantined, or that become known while the pipeline runs, are
+                onboarded; the pipeline completes when none are in progress.
+            location: the device location, or function given the :class:`DeviceItem`
+                that returns its location; see :meth:`DeviceManager.approve_many`
+            batch_size (int): the maximum number of devices approved together
+            max_workers (int): the maximum number of concurrent requests
+            min_interval (float): the minimum number of seconds between polls
+            max_interval (float): the maximum number of seconds between polls
+            timeout (float): the number of seconds after which the devices not yet
+                active are reported with a :class:`WaitTimeoutError`
+        """
+        self.devices = devices
+        self.expected = set(expected) if expected is not None else None
+        self.location = location
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.timeout = timeout
+        self.stopped = threading.Event()
+
+    # =========================================================================
+    #
+    #                             PUBLIC METHODS
+    #
+    # =========================================================================
+
+    def stop(self):
+        """
+        Stops the pipeline; devices in progress are reported with a :class:`WaitTimeoutError`.
+        """
+        self.stopped.set()
+
+    def run(self):
+        """
+        Runs the pipeline.
+
+        Returns:
+            generator of :data:`OnboardResult`, as each device becomes active or fails
+        """
+        start = time.time()
+        backoff = Backoff(initial=self.min_interval, factor=2, max_delay=self.max_interval,
+                          jitter=0)
+        timing, approved, finished = {}, set(), set()
+        known = None
+
+        while True:
+            self.devices.digest()
+            states = self._states()
+            elapsed = time.time() - start
+            progress = False
+
+            # new devices; when not given the expected devices, those quarantined at the
+            # start, and those that become known after the start.
+
+            if self.expected is not None:
+                found = self.expected & set(states)
+            elif known is None:
+                found = set(name for name, state in states.items()
+                            if state == DeviceItem.QUARANTINED)
+            else:
+                found = set(states) - known
+
+            known = set(states)
+
+            for name in found - set(timing) - finished:
+                timing[name] = dict(discovered=elapsed)
+                progress = True
+
+            # approve the new quarantined devices, a batch at a time
+
+            approve = sorted(name for name in set(timing) - approved
+                             if states.get(name) == DeviceItem.QUARANTINED)
+
+            for idx in range(0, len(approve), self.batch_size):
+                batch = approve[idx:idx + self.batch_size]
+                failed = self._approve(batch)
+                progress = True
+
+                for name in batch:
+                    if name in failed:
+                        finished.add(name)
+                        yield OnboardResult(name, states[name], timing.pop(name), failed[name])
+                    else:
+                        approved.add(name)
+                        timing[name]['approved'] = time.time() - start
+
+            # the devices now in service
+
+            for name in [name for name in timing if states.get(name) == self.ACTIVE]:
+                finished.add(name)
+                progress = True
+                dev_timing = timing.pop(name)
+                dev_timing['active'] = elapsed
+                yield OnboardResult(name, self.ACTIVE, dev_timing, None)
+
+            waiting = set(timing)
+            if self.expected is not None:
+                waiting |= self.expected - finished
+
+            if not waiting:
+                return
+
+            if elapsed > self.timeout or self.stopped.is_set():
+                for name in sorted(waiting):
+                    yield OnboardResult(name, states.get(name), timing.get(name, {}), WaitTimeoutError(
+                        'device %s not active after %d seconds' % (name, elapsed)))
+                return
+
+            if progress:
+                backoff.reset()
+            self.stopped.wait(backoff.next_delay())
+
+    # =========================================================================
+    #
+    #                             PRIVATE METHODS
+    #
+    # =========================================================================
+
+    def _states(self):
+        return {
+            name: item.get('status', {}).get('state')
+            for name, item in self.devices.cache['by_%s' % self.devices.LABEL].items()
+        }
+
+    def _approve(self, names):
+        """
+        Approves the devices, returning the dictionary of device name to exception
+        for those that could not be approved.
+        """
+        try:
+            self.devices.approve_many(names, location=self.location,
+                                      max_workers=self.max_workers)
+        except BulkRqstError as exc:
+            return {result.arg.name: result.error for result in exc.errors}
+        except SessionError as exc:
+            return {name: exc for name in names}
+
+        return {}
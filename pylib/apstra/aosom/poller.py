@@ -0,0 +1,212 @@
+# Copyright 2014-present, Apstra, Inc. All rights reserved.
+#
+# This source code is licensed under End User License Agreement found in the
+# LICENSE file at http://www.apstra.com/community/eula
+
+"""
+Periodic polling of device services, reporting only the data that changed.
+"""
+
+import json
+import time
+import heapq
+import random
+import hashlib
+import itertools
+
+from apstra.aosom.polling import Backoff
+from apstra.aosom.workers import run_concurrently
+from apstra.aosom.session_modules.devices import ServiceResult
+
+__all__ = [
+    'ServicePoller'
+]
+
+
+def _digest(items):
+    return hashlib.sha1(json.dumps(
+        items, sort_keys=True, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+
+class ServicePoller(object):
+    """
+    The ServicePoller periodically retrieves services from devices, and calls the
+    registered callbacks only when the service data of a device has changed since
+    it was last retrieved.  For example::
+
+        def lldp_changed(device, service, items):
+            print device.name, len(items)
+
+        poller = ServicePoller(aos.Devices, ['lldp'], interval=60)
+        poller.on_change(lldp_changed)
+        poller.run(stop_event)
+
+    Each (device, service) poll is scheduled independently.  The time between polls is
+    the `interval` varied randomly by up to `jitter` (a fraction of the interval), using
+    a fixed :class:`Backoff`, so that polls are spread out over time rather than all
+    made at once.  The polls that are due
+    together are made concurrently, with at most `max_workers` requests in flight.
+
+    The service data is not kept by the poller, only a hash of it is used to detect changes.
+    """
+    def __init__(self, devices, services, select=None, interval=60, jitter=0.1,
+                 max_workers=None):
+        """
+        Args:
+            devices: the :class:`DeviceManager` instance, i.e. `aos.Devices`
+            services (list): the service names to poll, e.g. ['lldp', 'interface']
+            select: the devices to poll; a list of device names or :class:`DeviceItem`,
+                or a function given each :class:`DeviceItem` that returns True to select it.
+                Defaults to all devices.
+            interval (float): the number of seconds between polls of each device service
+            jitter (float): the maximum random variation of the interval, as a fraction
+                of the interval
+            max_workers (int): the maximum number of concurrent requests
+        """
+        self.devices = devices
+        self.interval = interval
+        self.jitter = jitter
+        self.max_workers = max_workers
+        self._backoff = Backoff(initial=interval, factor=1, max_delay=interval, jitter=jitter)
+
+        self._schedule = []
+        self._sequence = itertools.count()
+        self._hashes = {}
+        self._change_callbacks = []
+        self._error_callbacks = []
+
+        # the first polls are spread over the jitter period.
+
+        now = time.time()
+        for dev in devices._select(select):
+            for service in services:
+                self.add(dev, service, start=now + random.uniform(0, self._spread))
+
+    # =========================================================================
+    #
+    #                             PROPERTIES
+    #
+    # =========================================================================
+
+    @property
+    def next_due(self):
+        """
+        Returns:
+            The time of the next scheduled poll, or `None` when nothing is scheduled
+        """
+        return self._schedule[0][0] if self._schedule else None
+
+    # =========================================================================
+    #
+    #                             PUBLIC METHODS
+    #
+    # =========================================================================
+
+    def add(self, device, service, start=None):
+        """
+        Schedules the polling of a device service.
+
+        Args:
+            device (DeviceItem): the device
+            service (str): the service name
+            start (float): the time of the first poll, defaults to now
+        """
+        # the sequence number orders polls due together, so that the devices
+        # themselves are never compared.
+
+        heapq.heappush(self._schedule, (
+            start or time.time(), device.name, service, next(self._sequence), device))
+
+    def on_change(self, callback):
+        """
+        Registers a function that is called as `callback(device, service, items)` when
+        the service data of a device is retrieved for the first time, and each time
+        it changes.
+        """
+        self._change_callbacks.append(callback)
+
+    def on_error(self, callback):
+        """
+        Registers a function that is called as `callback(device, service, error)` when
+        the service could not be retrieved from a device.
+        """
+        self._error_callbacks.append(callback)
+
+    def poll_due(self, now=None):
+        """
+        Polls each of the device services that are due and reschedules them.  An
+        exception raised by a callback is raised here, once the polls are rescheduled.
+
+        Args:
+            now (float): the current time, defaults to time.time()
+
+        Returns:
+            The list of :data:`ServiceResult` that changed or failed
+        """
+        now = now if now is not None else time.time()
+
+        due = []
+        while self._schedule and self._schedule[0][0] <= now:
+            _, _, service, _, device = heapq.heappop(self._schedule)
+            due.append((device, service))
+
+        if not due:
+            return []
+
+        # each poll is rescheduled before any callback is called, so that a
+        # callback exception does not drop the polls not yet reported.
+
+        for device, service in due:
+            self.add(device, service, start=now + self._backoff.next_delay())
+
+        reported = []
+
+        for result in run_concurrently(
+                lambda poll: poll[0].services[poll[1]], due, self.max_workers):
+            device, service = result.arg
+
+            if result.error:
+                for callback in self._error_callbacks:
+                    callback(device, service, result.error)
+
+                reported.append(ServiceResult(device, service, None, result.error))
+                continue
+
+            key = (device.name, service)
+            digest = _digest(result.value)
+            if self._hashes.get(key) == digest:
+                continue
+
+            self._hashes[key] = digest
+            for callback in self._change_callbacks:
+                callback(device, service, result.value)
+
+            reported.append(ServiceResult(device, service, result.value, None))
+
+        return reported
+
+    def run(self, stop_event):
+        """
+        Polls the device services until `stop_event` is set, waiting between polls.
+
+        Args:
+            stop_event (threading.Event): used to stop the polling
+        """
+        while not stop_event.is_set():
+            self.poll_due()
+
+            next_due = self.next_due
+            if next_due is None:
+                return
+
+            stop_event.wait(max(0, next_due - time.time()))
+
+    # =========================================================================
+    #
+    #                             PRIVATE METHODS
+    #
+    # =========================================================================
+
+    @property
+    def _spread(self):
+        return self.interval * self.jitter
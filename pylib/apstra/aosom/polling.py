@@ -0,0 +1,213 @@
+# Copyright 2014-present, Apstra, Inc. All rights reserved.
+#
+# This source code is licensed under End User License Agreement found in the
+# LICENSE file at http://www.apstra.com/community/eula
+
+"""
+Waiting for a condition on the AOS-server, for example a new blueprint becoming
+available or its build errors being resolved.  The condition is checked first
+without delay and then with exponentially increasing delays, so that an operation
+that completes quickly is not kept waiting and a slow one is not polled wastefully.
+The time each wait took to become ready is recorded in :data:`METRICS`.
+"""
+
+import time
+import random
+import threading
+from copy import copy
+from collections import namedtuple
+
+from apstra.aosom.exc import WaitTimeoutError
+
+__all__ = [
+    'Backoff',
+    'PollMetrics',
+    'PollResult',
+    'METRICS',
+    'poll'
+]
+
+#: the outcome of a successful :func:`poll`
+#:   * `value` - the value returned by the check
+#:   * `attempts` - the number of times the check was called
+#:   * `elapsed` - the number of seconds until the check succeeded
+
+PollResult = namedtuple('PollResult', ['value', 'attempts', 'elapsed'])
+
+
+class Backoff(object):
+    """
+    The delays between polls: `initial` seconds, multiplied by `factor` after each
+    delay up to `max_delay`.  Each delay is varied randomly by up to `jitter` (a
+    fraction of the delay) so that many concurrent waits do not poll in step.  A
+    `factor` of 1 gives a fixed, jittered, delay for periodic polling.
+
+    A Backoff keeps the current delay, so each wait uses its own copy; see :meth:`fresh`.
+    """
+    def __init__(self, initial=0.25, factor=2.0, max_delay=5.0, jitter=0.1):
+        """
+        Args:
+            initial (float): the first delay in seconds
+            factor (float): the growth of the delay after each poll
+            max_delay (float): the maximum delay in seconds
+            jitter (float): the maximum random variation of each delay, as a fraction
+                of the delay
+        """
+        self.initial = initial
+        self.factor = factor
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self._delay = initial
+
+    def fresh(self):
+        """
+        Returns:
+            A copy of this Backoff, starting at the `initial` delay, for the use of one wait
+        """
+        backoff = copy(self)
+        backoff.reset()
+        return backoff
+
+    def reset(self):
+        """
+        Returns the delay to the `initial` delay, for example once progress is made.
+        """
+        self._delay = self.initial
+
+    def next_delay(self):
+        """
+        Returns:
+            The next delay in seconds
+        """
+        delay = self._delay
+        self._delay = min(self._delay * self.factor, self.max_delay)
+        return delay * (1 + random.uniform(-self.jitter, self.jitter))
+
+
+class PollMetrics(object):
+    """
+    The latency-to-ready of the waits, by wait name, for example::
+
+        >>> from apstra.aosom.polling import METRICS
+        >>> METRICS.stats('blueprint.build_ready')
+        {'count': 4, 'timeouts': 1, 'attempts': 11, 'last': 1.27, 'min': 0.25,
+         'max': 2.81, 'mean': 1.31}
+
+    The latencies are those of the waits that became ready; `timeouts` is the number
+    of waits that did not.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, name, elapsed, attempts, ready=True):
+        """
+        Records the outcome of one wait.
+
+        Args:
+            name (str): the wait name
+            elapsed (float): the number of seconds waited
+            attempts (int): the number of times the condition was checked
+            ready (bool): False when the wait timed out
+        """
+        with self._lock:
+            stats = self._stats.setdefault(name, dict(
+                count=0, timeouts=0, attempts=0, total=0.0,
+                min=None, max=None, last=None))
+
+            stats['attempts'] += attempts
+            if not ready:
+                stats['timeouts'] += 1
+                return
+
+            stats['count'] += 1
+            stats['total'] += elapsed
+            stats['last'] = elapsed
+            stats['min'] = elapsed if stats['min'] is None else min(stats['min'], elapsed)
+            stats['max'] = elapsed if stats['max'] is None else max(stats['max'], elapsed)
+
+    def stats(self, name=None):
+        """
+        Args:
+            name (str): the wait name; when not provided, the statistics of all waits
+
+        Returns:
+            The dictionary of statistics of the named wait, or `None` if there have been
+            no such waits; otherwise the dictionary of wait name to statistics
+        """
+        with self._lock:
+            if name is None:
+                return {each: self._summary(stats) for each, stats in self._stats.items()}
+
+            stats = self._stats.get(name)
+            return self._summary(stats) if stats else None
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    @staticmethod
+    def _summary(stats):
+        summary = dict(stats)
+        total = summary.pop('total')
+        summary['mean'] = total / stats['count'] if stats['count'] else None
+        return summary
+
+
+#: the metrics recorded by :func:`poll` when no other metrics are given
+METRICS = PollMetrics()
+
+
+def poll(check, timeout, backoff=None, retry_on=(), name=None, metrics=METRICS):
+    """
+    Calls `check` until it returns a true value, waiting between calls as given by
+    `backoff`.  The last wait is shortened so that `check` is called once more at
+    the `timeout`.
+
+    Args:
+        check (callable): called without arguments; a true value is ready
+        timeout (float): the number of seconds after which to stop waiting
+        backoff (Backoff): the delays between calls, defaults to :class:`Backoff`.  The
+            given Backoff is not changed, so it can be shared by many waits.
+        retry_on (tuple): the exception types raised by `check` that are taken as
+            not ready; any other exception is raised immediately
+        name (str): the name the latency is recorded by in `metrics`; when not
+            provided the latency is not recorded
+        metrics (PollMetrics): where the latency is recorded
+
+    Raises:
+        WaitTimeoutError: `check` did not return a true value within `timeout`
+        the last exception raised by `check`, when it raised one of `retry_on`
+        on the last call
+
+    Returns:
+        a :data:`PollResult`
+    """
+    backoff = (backoff or Backoff()).fresh()
+    start = time.time()
+    attempts = 0
+
+    while True:
+        attempts += 1
+        error = None
+        try:
+            value = check()
+        except retry_on as exc:
+            value, error = None, exc
+
+        elapsed = time.time() - start
+        if value:
+            if name and metrics is not None:
+                metrics.record(name, elapsed, attempts)
+            return PollResult(value, attempts, elapsed)
+
+        remaining = timeout - elapsed
+        if remaining <= 0:
+            if name and metrics is not None:
+                metrics.record(name, elapsed, attempts, ready=False)
+            if error is not None:
+                raise error
+            raise WaitTimeoutError(
+                '%s not ready after %.1f seconds' % (name or 'condition', elapsed))
+
+        time.sleep(min(backoff.next_delay(), remaining))
@@ -0,0 +1,210 @@
+# Copyright 2014-present, Apstra, Inc. All rights reserved.
+#
+# This source code is licensed under End User License Agreement found in the
+# LICENSE file at http://www.apstra.com/community/eula
+
+"""
+Standing up many blueprints at once: creating each blueprint from its design
+template, writing its parameter values, and waiting for it to have no build errors.
+"""
+
+import time
+import itertools
+import threading
+from collections import namedtuple
+
+try:
+    from queue import PriorityQueue
+except ImportError:
+    from Queue import PriorityQueue
+
+from apstra.aosom.exc import SessionError
+from apstra.aosom.polling import Backoff, poll
+from apstra.aosom.workers import DEFAULT_MAX_WORKERS, run_concurrently
+
+__all__ = [
+    'BlueprintSpec',
+    'ProvisioningPipeline',
+    'ProvisionResult'
+]
+
+#: the blueprint to provision
+#:   * `name` - the blueprint name
+#:   * `template_id` - the design template ID
+#:   * `reference_arch` - the reference architecture, e.g. 'two_stage_l3clos'
+#:   * `params` - dictionary of slot name to the slot value to write
+
+BlueprintSpec = namedtuple('BlueprintSpec', ['name', 'template_id', 'reference_arch', 'params'])
+
+#: the outcome of provisioning one blueprint
+#:   * `name` - the blueprint name
+#:   * `item` - the :class:`BlueprintCollectionItem`, `None` if it was not created
+#:   * `timing` - dictionary of the number of seconds spent in each stage: 'queued'
+#:     until the blueprint was started, then 'create', 'params' and 'build'
+#:   * `stage` - the stage that failed, otherwise `None`
+#:   * `error` - the exception when the blueprint could not be provisioned, otherwise `None`
+
+ProvisionResult = namedtuple('ProvisionResult', ['name', 'item', 'timing', 'stage', 'error'])
+
+
+class ProvisioningPipeline(object):
+    """
+    The ProvisioningPipeline provisions many blueprints concurrently.  Each blueprint
+    goes through the stages in turn - 'create', 'params' and 'build' - but the
+    blueprints are in progress together, so that one blueprint is being created while
+    the parameters of another are written and a third waits to build.  For example::
+
+        specs = [BlueprintSpec(pod, template.id, 'two_stage_l3clos', pod_params[pod])
+                 for pod in pods]
+
+        for result in ProvisioningPipeline(aos.Blueprints, specs).run():
+            print result.name, result.error or result.timing
+
+    At most `max_workers` API requests are made at once, whatever the number of
+    blueprints in progress.  The wait for the build is a :func:`poll`, so a blueprint
+    waiting to build does not hold back the requests of the others.
+
+    The requests are made by worker threads, but each created blueprint is added to
+    the `blueprints` collection by the thread calling :meth:`run`, before the worker
+    threads go on to its parameters and build.
+    """
+
+    #: :data:`STAGES` are the stages of each blueprint, in order
+    STAGES = ('create', 'params', 'build')
+
+    def __init__(self, blueprints, specs, max_workers=None, max_blueprints=None,
+                 build_timeout=60000, backoff=None):
+        """
+        Args:
+            blueprints: the :class:`Blueprints` instance, i.e. `aos.Blueprints`
+            specs (list): the :data:`BlueprintSpec` of each blueprint
+            max_workers (int): the maximum number of concurrent requests
+            max_blueprints (int): the maximum number of blueprints in progress,
+                defaults to four times `max_workers`
+            build_timeout (int): timeout to wait for each blueprint to build, in
+                milliseconds
+            backoff (Backoff): the delays between the checks of the build status,
+                defaults to :class:`Backoff`
+        """
+        self.blueprints = blueprints
+        self.specs = list(specs)
+        self.max_workers = max_workers or DEFAULT_MAX_WORKERS
+        self.max_blueprints = max_blueprints or 4 * self.max_workers
+        self.build_timeout = build_timeout
+        self.backoff = backoff or Backoff()
+        self._requests = threading.BoundedSemaphore(self.max_workers)
+        self._start = None
+
+    # =========================================================================
+    #
+    #                             PUBLIC METHODS
+    #
+    # =========================================================================
+
+    def run(self):
+        """
+        Runs the pipeline.
+
+        Returns:
+            generator of :data:`ProvisionResult`, as each blueprint is provisioned or fails
+        """
+        self._start = time.time()
+
+        # the stages of each blueprint are queued as tasks: first the create, then,
+        # once the blueprint is added to the collection, the params and build.  The
+        # latter are taken first so that the blueprints in progress finish first.
+
+        tasks = PriorityQueue()
+        sequence = itertools.count()
+        stop = (-1, -1, None, None, None)
+
+        for spec in self.specs:
+            tasks.put((1, next(sequence), spec, self.blueprints[spec.name], None))
+        if not self.specs:
+            tasks.put(stop)
+
+        def feed():
+            for task in iter(tasks.get, stop):
+                yield task
+
+        results = run_concurrently(self._run_task, feed(), self.max_blueprints)
+
+        remaining = len(self.specs)
+        try:
+            for result in results:
+                _, _, spec, _, created = result.arg
+                provisioned = result.value
+
+                if not created and not provisioned.error:
+                    self.blueprints += provisioned.item
+                    tasks.put((0, next(sequence), spec, provisioned.item, provisioned))
+                    continue
+
+                remaining -= 1
+                if not remaining:
+                    tasks.put(stop)
+                yield provisioned
+        finally:
+            # let the feed finish, so that the workers can be stopped
+
+            tasks.put(stop)
+            results.close()
+
+    # =========================================================================
+    #
+    #                             PRIVATE METHODS
+    #
+    # =========================================================================
+
+    def _request(self, func, *args):
+        with self._requests:
+            return func(*args)
+
+    def _run_task(self, task):
+        _, _, spec, item, created = task
+        return self._complete(spec, created) if created else self._create(spec, item)
+
+    def _create(self, spec, item):
+        # the blueprint is created here, but it is added to the collection by
+        # the caller; the ProvisionResult carries it there.
+
+        timing = dict(queued=time.time() - self._start)
+        started = time.time()
+        try:
+            item._create_prepare(dict(
+                display_name=spec.name,
+                template_id=spec.template_id,
+                reference_architecture=spec.reference_arch))
+            self._request(item._create_request)
+        except Exception as exc:
+            timing['create'] = time.time() - started
+            return ProvisionResult(spec.name, None, timing, 'create', exc)
+
+        timing['create'] = time.time() - started
+        return ProvisionResult(spec.name, item, timing, None, None)
+
+    def _complete(self, spec, created):
+        item, timing = created.item, created.timing
+
+        # an error is reported with the stage it happened in, rather than raised,
+        # so that the stages completed are reported with it.
+
+        try:
+            stage, started = 'params', time.time()
+            params = item.params
+            self._request(params.digest)
+            for slot, value in (spec.params or {}).items():
+                self._request(params[slot].write, value)
+            timing[stage] = time.time() - started
+
+            stage, started = 'build', time.time()
+            poll(lambda: self._request(lambda: not item.build_errors),
+                 timeout=self.build_timeout / 1000.0, backoff=self.backoff,
+                 retry_on=(SessionError,), name='provision.build')
+            timing[stage] = time.time() - started
+
+        except Exception as exc:
+            timing[stage] = time.time() - started
+            return ProvisionResult(spec.name, item, timing, stage, exc)
+
+        return ProvisionResult(spec.name, item, timing, None, None)
@@ -10,9 +10,11 @@ from apstra.aosom.dynmodldr import DynamicModuleOwner
 
 from apstra.aosom.exc import (
     LoginServerUnreachableError, LoginError,
-    NoLoginError, LoginNoServerError)
+    NoLoginError, LoginNoServerError, BulkRqstError)
 
 from .session_api import Api
+from .unit_of_work import UnitOfWork
+from .workers import run_concurrently
 
 __all__ = ['Session']
 
@@ -212,6 +214,74 @@ class Session(DynamicModuleOwner):
 
         self.api.login(self.user, self.passwd)
 
+    def unit_of_work(self, max_workers=None, readback=False):
+        """
+        Creates a :class:`UnitOfWork` that is used to queue collection item create,
+        write, and delete operations, and then flush them concurrently.
+
+        Parameters
+        ----------
+        max_workers : int
+            The maximum number of concurrent API requests when flushing
+        readback : bool
+            Read the item values back from the AOS-server after each write
+
+        Returns
+        -------
+        UnitOfWork
+            The new, empty, unit-of-work instance
+        """
+        return UnitOfWork(self, max_workers=max_workers, readback=readback)
+
+    def prefetch(self, names=None, max_workers=None):
+        """
+        Loads the modules from the :data:`~Session.ModuleCatalog` and retrieves
+        their collection contents from the AOS-server concurrently, rather than
+        one at a time upon first use.  For example::
+
+            aos.prefetch(['IpPools', 'AsnPools', 'Blueprints'])
+
+        Parameters
+        ----------
+        names : list
+            The module names, defaults to all modules in the catalog
+        max_workers : int
+            The maximum number of concurrent API requests
+
+        Returns
+        -------
+        dict
+            The retrieval time, in seconds, for each module name
+
+        Raises
+        ------
+        SessionError
+            A name is not in the module catalog
+        BulkRqstError
+            One or more collections could not be retrieved; the `errors`
+            are the failed results, with the module name as the `arg`.
+            The other collections are retrieved.
+        """
+        names = list(names or self.ModuleCatalog)
+
+        # the modules are loaded from this thread; only the API requests are
+        # made concurrently.
+
+        modules = {name: getattr(self, name) for name in names}
+
+        timing, errors = {}, []
+        for result in run_concurrently(lambda name: modules[name].digest(),
+                                       names, max_workers):
+            if result.error:
+                errors.append(result)
+            else:
+                timing[result.arg] = result.elapsed
+
+        if errors:
+            raise BulkRqstError(errors)
+
+        return timing
+
     # ### ---------------------------------------------------------------------
     # ###
     # ###                         PRIVATE METHODS
@@ -10,15 +10,17 @@ import time
 
 from copy import copy
 
-import requests
-import semantic_version
-
 from apstra.aosom.exc import LoginServerUnreachableError, LoginAuthError
 
 
 class Api(object):
 
     def __init__(self):
+        # requests is imported here, rather than with this module, to keep
+        # the package import time down; see test_import_time.py
+
+        import requests
+
         self.server = None
         self.port = None
         self.url = None
@@ -98,6 +100,8 @@ class Api(object):
         Raises:
             - ValueError: the retrieve version string is not semantically valid
         """
+        import semantic_version
+
         got = self.requests.get("%s/versions/api" % self.url)
         self.version = copy(got.json())
 
@@ -19,3 +19,4 @@ class AsnPoolItem(CollectionItem):
 class AsnPools(Collection):
     Item = AsnPoolItem
     URI = 'resources/asn-pools'
+    DEPENDENCY_RANK = 10
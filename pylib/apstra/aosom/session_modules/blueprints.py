@@ -3,16 +3,30 @@
 # This source code is licensed under End User License Agreement found in the
 # LICENSE file at http://www.apstra.com/community/eula
 
-import retrying
+import time
+from collections import namedtuple
 
 from apstra.aosom.collection import Collection, CollectionItem
-from apstra.aosom.exc import SessionRqstError
+from apstra.aosom.exc import SessionError, SessionRqstError
 from apstra.aosom.dynmodldr import DynamicModuleOwner
+from apstra.aosom.snapshot import SnapshotWriter
+from apstra.aosom.workers import run_concurrently
+from apstra.aosom.polling import Backoff, METRICS, poll
+from apstra.aosom.blueprint_modules.diff import diff_contents
 
 __all__ = [
-    'Blueprints'
+    'Blueprints',
+    'BuildStatus'
 ]
 
+#: the build status of one blueprint, from :meth:`Blueprints.await_all_build_ready`
+#:   * `item` - the :class:`BlueprintCollectionItem`
+#:   * `ready` - True when the blueprint has no build errors
+#:   * `errors` - the build errors, or the exception raised retrieving them, when not ready
+#:   * `elapsed` - the number of seconds until ready, or until the wait ended
+
+BuildStatus = namedtuple('BuildStatus', ['item', 'ready', 'errors', 'elapsed'])
+
 
 class BlueprintCollectionItem(CollectionItem, DynamicModuleOwner):
     """
@@ -37,7 +51,8 @@ class BlueprintCollectionItem(CollectionItem, DynamicModuleOwner):
     @property
     def contents(self):
         """
-        Property accessor to blueprint contents.
+        Property accessor to blueprint contents.  The contents are cached;
+        see :meth:`get_contents`.
 
         :getter: returns the current blueprint data :class:`dict`
         :deletter: removes the blueprint from AOS-server
@@ -46,13 +61,7 @@ class BlueprintCollectionItem(CollectionItem, DynamicModuleOwner):
             SessionRqstError: upon issue with HTTP requests
 
         """
-        got = self.api.requests.get(self.url)
-        if not got.ok:
-            raise SessionRqstError(
-                message='unable to get blueprint contents',
-                resp=got)
-
-        return got.json()
+        return self.get_contents()
 
     @contents.deleter
     def contents(self):
@@ -93,7 +102,22 @@ class BlueprintCollectionItem(CollectionItem, DynamicModuleOwner):
     #
     # =========================================================================
 
-    def create(self, design_template_id, reference_arch, blocking=True):
+    def create(self, design_template_id, reference_arch, blocking=True, timeout=10000,
+               backoff=None):
+        """
+        Creates the blueprint from a design template.
+
+        Args:
+            design_template_id (str): the design template ID
+            reference_arch (str): the reference architecture, e.g. 'two_stage_l3clos'
+            blocking (bool): wait for the blueprint to be available
+            timeout (int): timeout to wait in milliseconds
+            backoff (Backoff): the delays between checks, defaults to :class:`Backoff`
+
+        Returns:
+            True: when the blueprint is available, or when not `blocking`
+            False: when the blueprint is not available after waiting `timeout`
+        """
         data = dict(
             display_name=self.name,
             template_id=design_template_id,
@@ -104,39 +128,134 @@ class BlueprintCollectionItem(CollectionItem, DynamicModuleOwner):
         if not blocking:
             return True
 
-        @retrying.retry(wait_fixed=1000, stop_max_delay=10000)
-        def wait_for_blueprint():
-            assert self.id
-
-        # noinspection PyBroadException
         try:
-            wait_for_blueprint()
-        except:
+            poll(lambda: self.id, timeout=timeout / 1000.0, backoff=backoff,
+                 retry_on=(SessionError,), name='blueprint.create')
+        except SessionError:
             return False
 
         return True
 
-    def await_build_ready(self, timeout=5000):
+    def get_contents(self, refresh=False):
+        """
+        Retrieves the blueprint contents.  When the AOS-server provides validators
+        (ETag or Last-Modified) with the contents, the contents are cached by the
+        :class:`Blueprints` collection and later requests are made conditional, so
+        that the contents are only transferred again when they have changed.
+
+        The cached contents are shared, and should not be modified by the caller.
+
+        Args:
+            refresh (bool): when True, the contents are transferred regardless
+                of the cache
+
+        Raises:
+            SessionRqstError: upon issue with HTTP requests
+
+        Returns:
+            the current blueprint data :class:`dict`
+        """
+        cached = None if refresh else self.collection._contents.get(self.id)
+
+        headers = {}
+        if cached:
+            validators, _ = cached
+            if 'ETag' in validators:
+                headers['If-None-Match'] = validators['ETag']
+            if 'Last-Modified' in validators:
+                headers['If-Modified-Since'] = validators['Last-Modified']
+
+        got = self.api.requests.get(self.url, headers=headers)
+
+        if cached and got.status_code == 304:
+            return cached[1]
+
+        if not got.ok:
+            raise SessionRqstError(
+                message='unable to get blueprint contents',
+                resp=got)
+
+        contents = got.json()
+
+        validators = {name: got.headers[name] for name in ('ETag', 'Last-Modified')
+                      if name in got.headers}
+
+        if validators:
+            self.collection._contents[self.id] = (validators, contents)
+        else:
+            self.collection._contents.pop(self.id, None)
+
+        return contents
+
+    def diff(self, previous):
+        """
+        Compares an earlier version of the blueprint contents with the current
+        contents; see :mod:`apstra.aosom.blueprint_modules.diff`.
+
+        Args:
+            previous: the earlier contents (dict), or its :class:`ContentsDigest`
+
+        Raises:
+            SessionRqstError: upon issue with HTTP requests
+
+        Returns:
+            a :data:`BlueprintDiff` of the nodes and relationships added, removed
+            or changed since `previous`
+        """
+        return diff_contents(previous, self.get_contents())
+
+    def snapshot_save(self, filepath):
+        """
+        Saves the blueprint contents to a compact snapshot file.  Each top-level
+        contents value is stored as a record; values that are dictionaries of
+        dictionaries, for example nodes by ID, are stored with one record per
+        entry keyed as "<section>/<key>" so that a single entry can be read
+        without reading the whole file.  Use :class:`Snapshot` to read the file.
+
+        Args:
+            filepath (str): the snapshot file to create
+
+        Raises:
+            SessionRqstError: upon issue with HTTP requests
+            IOError: for any I/O related error
+        """
+        contents = self.contents
+
+        def is_split(value):
+            return bool(value) and isinstance(value, dict) and all(
+                isinstance(each, dict) for each in value.values())
+
+        split = [key for key, value in contents.items() if is_split(value)]
+
+        meta = dict(kind='blueprint', name=self.name, id=self.id, split=split)
+
+        with SnapshotWriter(filepath, meta=meta) as snap:
+            for key, value in contents.items():
+                if key in split:
+                    for sub_key, sub_value in value.items():
+                        snap.add('%s/%s' % (key, sub_key), sub_value)
+                else:
+                    snap.add(key, value)
+
+    def await_build_ready(self, timeout=5000, backoff=None):
         """
         Wait a specific amount of `timeout` for the blueprint build status
-        to return no errors.  The waiting polling interval is fixed at 1sec.
+        to return no errors.  The build status is checked at once, and then with
+        increasing delays given by `backoff`.
 
         Args:
             timeout (int): timeout to wait in miliseconds
+            backoff (Backoff): the delays between checks, defaults to :class:`Backoff`
 
         Returns:
             True: when the blueprint contains to build errors
             False: when the blueprint contains build errors, even after waiting `timeout`
 
         """
-        @retrying.retry(wait_fixed=1000, stop_max_delay=timeout)
-        def wait_for_no_errors():
-            assert not self.build_errors
-
-        # noinspection PyBroadException
         try:
-            wait_for_no_errors()
-        except:
+            poll(lambda: not self.build_errors, timeout=timeout / 1000.0, backoff=backoff,
+                 retry_on=(SessionError,), name='blueprint.build_ready')
+        except SessionError:
             return False
 
         return True
@@ -147,4 +266,91 @@ class Blueprints(Collection):
     Blueprints collection class provides management of AOS blueprint instances.
     """
     URI = 'blueprints'
+    DEPENDENCY_RANK = 50
     Item = BlueprintCollectionItem
+
+    def __init__(self, owner):
+        super(Blueprints, self).__init__(owner)
+
+        # the cached blueprint contents; by blueprint ID, the tuple of
+        # the response validators and the contents
+
+        self._contents = {}
+        self.subscribe(self._discard_contents)
+
+    # =========================================================================
+    #
+    #                             PUBLIC METHODS
+    #
+    # =========================================================================
+
+    def await_all_build_ready(self, items, timeout=5000, backoff=None, max_workers=None):
+        """
+        Waits for many blueprints to have no build errors.  The blueprints still waiting
+        are checked together, at once and then with increasing delays given by `backoff`,
+        with at most `max_workers` concurrent requests.  The status of each blueprint is
+        generated as soon as it is known.  For example::
+
+            for status in aos.Blueprints.await_all_build_ready(pods, timeout=60000):
+                print status.item.name, status.ready, status.elapsed
+
+        The time each blueprint took to become ready is recorded in
+        :data:`apstra.aosom.polling.METRICS` as 'blueprint.build_ready'.
+
+        Args:
+            items (list): the blueprint names or :class:`BlueprintCollectionItem` instances
+            timeout (int): timeout to wait in milliseconds
+            backoff (Backoff): the delays between checks, defaults to :class:`Backoff`
+            max_workers (int): maximum number of concurrent requests
+
+        Returns:
+            generator of :data:`BuildStatus`; the blueprints that are not ready after
+            `timeout` are reported with `ready` False
+        """
+        start = time.time()
+        backoff = (backoff or Backoff()).fresh()
+        waiting = [item if isinstance(item, BlueprintCollectionItem) else self[item]
+                   for item in items]
+        last_errors = {}
+        attempts = 0
+
+        while waiting:
+            checked_at = time.time()
+            still_waiting = []
+            attempts += 1
+
+            for result in run_concurrently(
+                    lambda item: item.build_errors, waiting, max_workers):
+                item = result.arg
+                if result.error is None and not result.value:
+                    elapsed = time.time() - start
+                    METRICS.record('blueprint.build_ready', elapsed, attempts)
+                    yield BuildStatus(item, True, None, elapsed)
+                else:
+                    last_errors[item.name] = result.error or result.value
+                    still_waiting.append(item)
+
+            waiting = still_waiting
+            if not waiting:
+                return
+
+            elapsed = time.time() - start
+            remaining = timeout / 1000.0 - elapsed
+            if remaining <= 0:
+                for item in waiting:
+                    METRICS.record('blueprint.build_ready', elapsed, attempts, ready=False)
+                    yield BuildStatus(item, False, last_errors[item.name], elapsed)
+                return
+
+            delay = min(backoff.next_delay(), remaining)
+            time.sleep(max(0, delay - (time.time() - checked_at)))
+
+    # =========================================================================
+    #
+    #                             PRIVATE METHODS
+    #
+    # =========================================================================
+
+    def _discard_contents(self, collection, event, item, previous):
+        if event == 'remove':
+            self._contents.pop(item[self.UNIQUE_ID], None)
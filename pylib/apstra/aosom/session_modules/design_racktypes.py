@@ -10,3 +10,4 @@ __all__ = ['DesignRackTypes']
 
 class DesignRackTypes(Collection):
     URI = 'design/rack-types'
+    DEPENDENCY_RANK = 30
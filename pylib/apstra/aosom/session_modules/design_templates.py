@@ -10,3 +10,5 @@ __all__ = ['DesignTemplates']
 
 class DesignTemplates(Collection):
     URI = 'design/templates'
+    DEPENDENCY_RANK = 40
+    WRITE_PATCH = True
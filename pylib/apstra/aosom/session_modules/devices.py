@@ -3,12 +3,24 @@
 # This source code is licensed under End User License Agreement found in the
 # LICENSE file at http://www.apstra.com/community/eula
 
-import retrying
+import time
+from copy import deepcopy
+from collections import namedtuple, defaultdict
 
-from apstra.aosom.exc import SessionRqstError
+from apstra.aosom.exc import SessionRqstError, BulkRqstError
 from apstra.aosom.collection import Collection, CollectionItem
+from apstra.aosom.workers import run_concurrently
+from apstra.aosom.polling import poll
 
-__all__ = ['DeviceManager']
+__all__ = ['DeviceManager', 'ServiceResult']
+
+#: the outcome of retrieving one service from one device
+#:   * `device` - the :class:`DeviceItem`
+#:   * `service` - the service name, e.g. 'lldp'
+#:   * `items` - the service items, `None` if the retrieval failed
+#:   * `error` - the exception raised, `None` if the retrieval succeeded
+
+ServiceResult = namedtuple('ServiceResult', ['device', 'service', 'items', 'error'])
 
 
 class DeviceServices(object):
@@ -35,6 +47,11 @@ class DeviceServices(object):
 
 
 class DeviceItem(CollectionItem):
+
+    #: :data:`QUARANTINED` is the management state of a device awaiting approval
+
+    QUARANTINED = 'OOS-QUARANTINED'
+
     @property
     def services(self):
         return DeviceServices(self)
@@ -57,7 +74,7 @@ class DeviceItem(CollectionItem):
         True if this device is approved
         False otherwise
         """
-        return bool(self.id in self.collection.approved.ids)
+        return self.collection.approved.is_approved(self.id)
 
     @property
     def user_config(self):
@@ -65,6 +82,10 @@ class DeviceItem(CollectionItem):
         As a **getter** returns the current `user_config` dictionary of values.
         As a **setter** provides the ability to set the `user_config` values.
 
+        The value is retrieved from the AOS-server if it has not been retrieved, by
+        the device or by the :meth:`DeviceManager.digest`, or set within the last
+        :data:`DeviceManager.USER_CONFIG_MAX_AGE` seconds; see :meth:`get_user_config`.
+
         Returns
         -------
         dict
@@ -75,8 +96,7 @@ class DeviceItem(CollectionItem):
         SessionRqstError
             when error occurs in setting the `user_config` value
         """
-        self.read()
-        return self.value.get('user_config')
+        return self.get_user_config()
 
     @user_config.setter
     def user_config(self, value):
@@ -89,6 +109,45 @@ class DeviceItem(CollectionItem):
                 message='unable to set user_config',
                 resp=got)
 
+        # the device now has the value written, so keep it rather than
+        # retrieving it again.
+
+        self.datum['user_config'] = value
+        baseline = self._snapshot
+        if baseline is not None:
+            baseline['user_config'] = deepcopy(value)
+        self.collection._user_config_at[self.id] = time.time()
+
+    def get_user_config(self, refresh=False):
+        """
+        Returns the `user_config` dictionary of values, retrieving the device from the
+        AOS-server only when the value held is older than
+        :data:`DeviceManager.USER_CONFIG_MAX_AGE` seconds, or when `refresh` is True.
+
+        Parameters
+        ----------
+        refresh : bool
+            Retrieve the value from the AOS-server regardless of its age
+
+        Returns
+        -------
+        dict
+            The 'user_config' dictionary of values
+
+        Raises
+        ------
+        SessionRqstError
+            when the device could not be retrieved
+        """
+        collection = self.collection
+        had_at = collection._user_config_at.get(self.id)
+
+        if refresh or had_at is None or time.time() - had_at > collection.USER_CONFIG_MAX_AGE:
+            self.read()
+            collection._user_config_at[self.id] = time.time()
+
+        return self.value.get('user_config')
+
     def approve(self, location=None):
         """
         Approves this device for use by the AOS system.  If the device is already approved, then this
@@ -109,40 +168,110 @@ class DeviceItem(CollectionItem):
         SessionRqstError
             An error has occurred attempting to make the approve request with the AOS Server API
         """
-        if self.state != 'OOS-QUARANTINED':
+        if self.state != self.QUARANTINED:
             return False
 
+        self._approve_config(location)
+        self.collection.approved.update([self.id])
+
+        return True
+
+    def _approve_config(self, location=None):
         self.user_config = dict(
             admin_state='normal',
             aos_hcl_model=self.value['facts']['aos_hcl_model'],
             location=location or '')
 
-        self.collection.approved.update([self.id])
 
-        return True
+class Approved(object):
+    """
+    The set of devices approved for use by AOS, i.e. the members of the default device pool.
+    The pool is retrieved from the AOS-server when first needed and then cached for up to
+    `max_age` seconds, so that checking the approval of many devices costs a single request.
+    """
 
+    #: :data:`MAX_AGE` is the default number of seconds the cached pool is used before
+    #: it is retrieved again.
 
-class Approved(object):
-    def __init__(self, api):
+    MAX_AGE = 60
+
+    #: :data:`UPDATE_TIMEOUT` is the number of seconds an update of the pool is
+    #: retried before the error is raised.
+
+    UPDATE_TIMEOUT = 3
+
+    def __init__(self, api, max_age=None):
         self.api = api
         self.url = '%s/resources/device-pools/default_pool' % self.api.url
+        self.max_age = max_age if max_age is not None else self.MAX_AGE
+        self._devices = None
+        self._id_set = frozenset()
+        self._fetched_at = 0
 
     @property
     def ids(self):
-        return [item['id'] for item in self.get_devices()]
+        """
+        Returns
+        -------
+        list
+            The approved device IDs, in pool order
+        """
+        return [item['id'] for item in self._cached_devices()]
+
+    @property
+    def id_set(self):
+        """
+        Returns
+        -------
+        frozenset
+            The approved device IDs
+        """
+        self._cached_devices()
+        return self._id_set
+
+    def is_approved(self, device_id):
+        """
+        Parameters
+        ----------
+        device_id : str
+            The device ID, i.e. the device key
+
+        Returns
+        -------
+        True if the device is approved
+        False otherwise
+        """
+        return device_id in self.id_set
+
+    def refresh(self):
+        """
+        Retrieves the pool from the AOS-server, replacing the cached pool.
+        """
+        self.get()
+
+    def invalidate(self):
+        """
+        Discards the cached pool so that it is retrieved again upon next use.
+        """
+        self._devices = None
 
     def get(self):
         got = self.api.requests.get(self.url)
         if not got.ok:
             raise SessionRqstError(got)
 
-        return got.json()
+        body = got.json()
+        self._cache_devices(body['devices'])
+        return body
 
     def get_devices(self):
         return self.get()['devices']
 
     def update(self, device_keys):
-        has_devices = self.get_devices()
+        # a copy of the cached pool, so that the cache is not changed unless
+        # the update succeeds.
+
+        has_devices = list(self.get_devices())
 
         has_ids = set([dev['id'] for dev in has_devices])
         should_ids = has_ids | set(device_keys)
@@ -157,9 +286,6 @@ class Approved(object):
         for new_id in diff_ids:
             has_devices.append(dict(id=new_id))
 
-        timeout = 3000
-
-        @retrying.retry(wait_fixed=1000, stop_max_delay=timeout)
         def put_updated():
             got = self.api.requests.put(
                 self.url, json=dict(display_name='Default Pool',
@@ -170,7 +296,188 @@ class Approved(object):
                     message='unable to update approved list: %s' % got.text,
                     resp=got)
 
-        put_updated()
+            return True
+
+        poll(put_updated, timeout=self.UPDATE_TIMEOUT, retry_on=(SessionRqstError,),
+             name='approved.update')
+
+        # the PUT value is now the pool membership, so there is no
+        # need to retrieve it again.
+
+        self._cache_devices(has_devices)
+
+    # =========================================================================
+    #
+    #                             PRIVATE METHODS
+    #
+    # =========================================================================
+
+    def _cache_devices(self, devices):
+        self._devices = devices
+        self._id_set = frozenset(dev['id'] for dev in devices)
+        self._fetched_at = time.time()
+
+    def _cached_devices(self):
+        if self._devices is None or time.time() - self._fetched_at > self.max_age:
+            self.get()
+
+        return self._devices
+
+
+class DeviceIndex(object):
+    """
+    An index of the devices in the :class:`DeviceManager` cache by management state, by
+    HCL model, and by approval status.  The index is kept current as the cache changes:
+    when the devices are digested again, only the devices whose state or model changed
+    are re-indexed.  For example::
+
+        >>> aos.Devices.index.count(state='OOS-QUARANTINED')
+        12
+        >>> aos.Devices.index.names(model='Cumulus_VX', approved=False)
+        ['5254002D005F', '525400A3E3B7']
+    """
+    def __init__(self, devices):
+        self.devices = devices
+        self._by_state = defaultdict(set)
+        self._by_model = defaultdict(set)
+        self._indexed = {}
+        self._approved_names = set()
+        self._approved_from = None
+
+        devices.subscribe(self.on_collection_change)
+
+    # =========================================================================
+    #
+    #                             PUBLIC METHODS
+    #
+    # =========================================================================
+
+    def names(self, state=None, model=None, approved=None):
+        """
+        Returns the names of the devices matching all of the given criteria.
+
+        Parameters
+        ----------
+        state : str
+            The management state, e.g. 'IS-ACTIVE'
+        model : str
+            The AOS HCL model, e.g. 'Cumulus_VX'
+        approved : bool
+            The approval status
+
+        Returns
+        -------
+        list
+            The device names
+        """
+        return list(self._matching(state, model, approved))
+
+    def count(self, state=None, model=None, approved=None):
+        """
+        Returns the number of devices matching all of the given criteria; see :meth:`names`.
+        """
+        return len(self._matching(state, model, approved))
+
+    @property
+    def states(self):
+        """
+        Returns
+        -------
+        dict
+            The number of devices in each management state
+        """
+        self._ensure()
+        return {state: len(names) for state, names in self._by_state.items() if names}
+
+    def on_collection_change(self, collection, event, item, previous):
+        """
+        The :meth:`Collection.subscribe` callback that maintains the index.
+        """
+        if event == 'digest':
+            self._reindex(collection.cache['list'])
+        elif event == 'remove':
+            self._unindex(item[collection.LABEL])
+        else:
+            if previous is not None and previous[collection.LABEL] != item[collection.LABEL]:
+                self._unindex(previous[collection.LABEL])
+            self._index(item)
+
+    # =========================================================================
+    #
+    #                             PRIVATE METHODS
+    #
+    # =========================================================================
+
+    def _key(self, item):
+        return (item.get('status', {}).get('state'),
+                item.get('facts', {}).get('aos_hcl_model'),
+                item[self.devices.UNIQUE_ID])
+
+    def _index(self, item):
+        name = item[self.devices.LABEL]
+        key = self._key(item)
+        if self._indexed.get(name) == key:
+            return
+
+        self._unindex(name)
+        state, model, dev_id = self._indexed[name] = key
+        self._by_state[state].add(name)
+        self._by_model[model].add(name)
+
+        if self._approved_from is not None and dev_id in self._approved_from:
+            self._approved_names.add(name)
+
+    def _unindex(self, name):
+        key = self._indexed.pop(name, None)
+        if key is None:
+            return
+
+        state, model, _ = key
+        self._by_state[state].discard(name)
+        self._by_model[model].discard(name)
+        self._approved_names.discard(name)
+
+    def _reindex(self, items):
+        current = set(item[self.devices.LABEL] for item in items)
+        for name in set(self._indexed) - current:
+            self._unindex(name)
+
+        for item in items:
+            self._index(item)
+
+    def _ensure(self):
+        # cause the devices to be digested, and so indexed, if not already
+
+        return self.devices.cache
+
+    def _approved(self):
+        id_set = self.devices.approved.id_set
+        if id_set is not self._approved_from:
+            self._approved_names = set(
+                name for name, (_, _, dev_id) in self._indexed.items() if dev_id in id_set)
+            self._approved_from = id_set
+
+        return self._approved_names
+
+    def _matching(self, state, model, approved):
+        self._ensure()
+
+        selected = [self._by_state.get(state, set()) if state is not None else None,
+                    self._by_model.get(model, set()) if model is not None else None]
+
+        if approved is not None:
+            approved_names = self._approved()
+            selected.append(approved_names if approved
+                            else set(self._indexed) - approved_names)
+
+        selected = sorted(filter(lambda names: names is not None, selected), key=len)
+        if not selected:
+            return self._indexed
+
+        if len(selected) == 1:
+            return selected[0]
+
+        return selected[0].intersection(*selected[1:])
 
 
 class DeviceManager(Collection):
@@ -178,6 +485,159 @@ class DeviceManager(Collection):
     LABEL = 'device_key'
     Item = DeviceItem
 
+    #: :data:`USER_CONFIG_MAX_AGE` is the number of seconds a device `user_config`
+    #: value is used before it is retrieved from the AOS-server again.
+
+    USER_CONFIG_MAX_AGE = 30
+
     def __init__(self, owner):
         super(DeviceManager, self).__init__(owner)
+        self._user_config_at = {}
         self.approved = Approved(owner.api)
+        self.index = DeviceIndex(self)
+
+    def digest(self):
+        # the devices retrieved include their user_config values, which are then
+        # used without retrieving each device again until they are too old.
+
+        digested = super(DeviceManager, self).digest()
+
+        now = time.time()
+        self._user_config_at = {
+            item[self.UNIQUE_ID]: now for item in self._cache['list'] if 'user_config' in item}
+
+        return digested
+
+    def approve_many(self, devices=None, location=None, max_workers=None):
+        """
+        Approves many devices for use by the AOS system.  The `user_config` of each
+        quarantined device is set concurrently, and then the approved device pool is
+        updated once with all of the devices.  Devices that are not quarantined are
+        ignored.  For example::
+
+            aos.Devices.approve_many(lambda dev: dev.name.startswith('5254'),
+                                     location=lambda dev: 'rack-%s' % dev.name[-2:])
+
+        Parameters
+        ----------
+        devices : list or callable
+            The device names or :class:`DeviceItem` instances, or a function that is
+            given each :class:`DeviceItem` and returns True to select it.  Defaults to
+            all devices.
+        location : str or callable
+            The location value for all devices, or a function that is given each
+            :class:`DeviceItem` and returns its location value.
+        max_workers : int
+            The maximum number of concurrent requests
+
+        Returns
+        -------
+        list
+            The :class:`DeviceItem` instances that were approved
+
+        Raises
+        ------
+        BulkRqstError
+            The `user_config` of one or more devices could not be set; the `errors`
+            are the failed results with the device as the `arg`.  The other
+            devices are approved.
+        SessionRqstError
+            The approved device pool could not be updated
+        """
+        candidates = [dev for dev in self._select(devices)
+                      if dev.state == DeviceItem.QUARANTINED]
+
+        def set_config(dev):
+            dev._approve_config(location(dev) if callable(location) else location)
+
+        done, errors = [], []
+        for result in run_concurrently(set_config, candidates, max_workers):
+            if result.error:
+                errors.append(result)
+            else:
+                done.append(result.arg)
+
+        if done:
+            self.approved.update([dev.id for dev in done])
+
+        if errors:
+            raise BulkRqstError(errors)
+
+        return done
+
+    def fetch_services(self, services, devices=None, max_workers=None):
+        """
+        Retrieves one or more services from many devices concurrently.  The results are
+        generated as each retrieval completes; a failure for one device does not stop the
+        others.  For example::
+
+            for result in aos.Devices.fetch_services(['lldp', 'interface']):
+                if result.error:
+                    print result.device.name, result.error
+                else:
+                    print result.device.name, result.service, len(result.items)
+
+        Parameters
+        ----------
+        services : str or list
+            The service name, or list of service names
+        devices : list or callable
+            The device names or :class:`DeviceItem` instances, or a function that is
+            given each :class:`DeviceItem` and returns True to select it.  Defaults to
+            all devices.
+        max_workers : int
+            The maximum number of concurrent requests
+
+        Returns
+        -------
+        generator
+            A :data:`ServiceResult` for each device and service, in order of completion
+        """
+        if not isinstance(services, (list, tuple)):
+            services = [services]
+
+        fetches = [(dev, service) for dev in self._select(devices) for service in services]
+
+        for result in run_concurrently(
+                lambda fetch: fetch[0].services[fetch[1]], fetches, max_workers):
+            dev, service = result.arg
+            yield ServiceResult(dev, service, result.value, result.error)
+
+    def approval_status(self, names=None):
+        """
+        Determines the approval status of many devices using a single retrieval
+        of the approved device pool.
+
+        Parameters
+        ----------
+        names : list
+            The device names, i.e. device keys; defaults to all known devices
+
+        Returns
+        -------
+        dict
+            The approval status (bool) for each device name
+        """
+        approved = self.approved.id_set
+        by_label = self.cache['by_%s' % self.LABEL]
+
+        return {
+            name: name in by_label and by_label[name][self.UNIQUE_ID] in approved
+            for name in (names if names is not None else self.names)
+        }
+
+    # =========================================================================
+    #
+    #                             PRIVATE METHODS
+    #
+    # =========================================================================
+
+    def _select(self, devices=None):
+        """
+        Returns the list of :class:`DeviceItem` given a list of device names or items,
+        or a predicate function; all devices when `devices` is None.
+        """
+        if devices is None or callable(devices):
+            return [dev for dev in self if devices is None or devices(dev)]
+
+        return [dev if isinstance(dev, DeviceItem) else self[dev] for dev in devices]
@@ -10,3 +10,4 @@ __all__ = ['ExternalRouters']
 
 class ExternalRouters(Collection):
     URI = 'resources/external-routers'
+    DEPENDENCY_RANK = 10
@@ -19,3 +19,4 @@ class IpPoolItem(CollectionItem):
 class IpPools(Collection):
     Item = IpPoolItem
     URI = 'resources/ip-pools'
+    DEPENDENCY_RANK = 10
@@ -10,3 +10,4 @@ __all__ = ['LogicalDeviceMaps']
 
 class LogicalDeviceMaps(Collection):
     URI = 'design/logical-device-maps'
+    DEPENDENCY_RANK = 30
@@ -10,3 +10,4 @@ __all__ = ['LogicalDevices']
 
 class LogicalDevices(Collection):
     URI = 'design/logical-devices'
+    DEPENDENCY_RANK = 20
@@ -0,0 +1,253 @@
+# Copyright 2014-present, Apstra, Inc. All rights reserved.
+#
+# This source code is licensed under End User License Agreement found in the
+# LICENSE file at http://www.apstra.com/community/eula
+
+"""
+A compact snapshot file format for offline use of collection items and blueprint
+contents.  The file is a sequence of length-prefixed, zlib compressed JSON records
+followed by a compressed index of record keys, so that a single record can be read
+without reading the whole file::
+
+    MAGIC | (length, record)* | index | index-offset, index-length, MAGIC
+
+The :class:`Snapshot` reader can memory-map the file for fast repeated queries.
+"""
+
+import json
+import struct
+import zlib
+
+from apstra.aosom.exc import SnapshotFormatError
+
+__all__ = [
+    'SnapshotWriter',
+    'Snapshot'
+]
+
+MAGIC = b'AOSSNAP\x01'
+
+_LENGTH = struct.Struct('>I')
+_TRAILER = struct.Struct('>QI')
+_TRAILER_SIZE = _TRAILER.size + len(MAGIC)
+
+
+def _encode(value):
+    return json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+
+def _decode(data):
+    return json.loads(data.decode('utf-8'))
+
+
+class SnapshotWriter(object):
+    """
+    Writes a snapshot file, one record at a time.  For example::
+
+        with SnapshotWriter('/tmp/pools.snap', meta=dict(kind='collection')) as snap:
+            for item in aos.IpPools:
+                snap.add(item.name, item.value)
+    """
+    def __init__(self, filepath, meta=None, level=6):
+        """
+        Args:
+            filepath (str): the snapshot file to create
+            meta (dict): additional information stored in the index
+            level (int): the zlib compression level
+        """
+        self.meta = meta or {}
+        self.level = level
+        self._index = []
+        self._file = open(filepath, 'wb')
+        self._file.write(MAGIC)
+
+    def add(self, key, value):
+        """
+        Adds a record.
+
+        Args:
+            key (str): the record key, used for random access
+            value: the JSON serializable record value
+        """
+        self.add_raw(key, _encode(value))
+
+    def add_raw(self, key, data):
+        """
+        Adds a record whose value is already JSON encoded.
+
+        Args:
+            key (str): the record key, used for random access
+            data (bytes): the JSON encoded record value
+        """
+        record = zlib.compress(data, self.level)
+        self._file.write(_LENGTH.pack(len(record)))
+        self._index.append((key, self._file.tell(), len(record)))
+        self._file.write(record)
+
+    def close(self):
+        """
+        Writes the index and closes the file.
+        """
+        if self._file.closed:
+            return
+
+        index = zlib.compress(_encode(dict(meta=self.meta, keys=self._index)), self.level)
+        offset = self._file.tell()
+        self._file.write(index)
+        self._file.write(_TRAILER.pack(offset, len(index)) + MAGIC)
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # a snapshot is only completed when all of its records were written;
+        # otherwise it is left without an index, so that it is not taken as valid.
+
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+
+
+class Snapshot(object):
+    """
+    Reads a snapshot file.  Only the index is read when the file is opened; each
+    record is read and decompressed when it is accessed.  For example::
+
+        with Snapshot('/tmp/pools.snap') as snap:
+            print snap.keys()
+            print snap['Switches-IpAddrs']['subnets']
+
+    The public attributes are:
+        * :attr:`meta` - the information stored by the writer
+    """
+    def __init__(self, filepath, use_mmap=True):
+        """
+        Args:
+            filepath (str): the snapshot file
+            use_mmap (bool): memory-map the file rather than using seek/read
+        """
+        self._file = open(filepath, 'rb')
+        self._mmap = None
+
+        try:
+            if use_mmap:
+                import mmap
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+            self._read_index()
+        except (ValueError, EnvironmentError, zlib.error, SnapshotFormatError):
+            self.close()
+            raise
+
+    # =========================================================================
+    #
+    #                             PUBLIC METHODS
+    #
+    # =========================================================================
+
+    def keys(self):
+        """
+        Returns:
+            The list of record keys, in the order they were written
+        """
+        return list(self._keys)
+
+    def get(self, key, default=None):
+        return self[key] if key in self._index else default
+
+    def items(self):
+        """
+        Returns:
+            generator of (key, value) for each record, in the order they were written
+        """
+        return ((key, self[key]) for key in self._keys)
+
+    def to_dict(self):
+        """
+        Reads all the records.  For blueprint contents snapshots, the contents
+        dictionary is reassembled from the records.
+
+        Returns:
+            dict of record key to value, or the blueprint contents
+        """
+        values = {}
+        split = set(self.meta.get('split', []))
+
+        for key, value in self.items():
+            section, _, sub_key = key.partition('/')
+            if section in split:
+                values.setdefault(section, {})[sub_key] = value
+            else:
+                values[key] = value
+
+        return values
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+        self._file.close()
+
+    # =========================================================================
+    #
+    #                             PRIVATE METHODS
+    #
+    # =========================================================================
+
+    def _read(self, offset, length):
+        if self._mmap is not None:
+            return self._mmap[offset:offset + length]
+
+        self._file.seek(offset)
+        return self._file.read(length)
+
+    def _read_index(self):
+        self._file.seek(0, 2)
+        size = self._file.tell()
+
+        if size < len(MAGIC) + _TRAILER_SIZE or self._read(0, len(MAGIC)) != MAGIC:
+            raise SnapshotFormatError('not a snapshot file: %s' % self._file.name)
+
+        trailer = self._read(size - _TRAILER_SIZE, _TRAILER_SIZE)
+        if trailer[_TRAILER.size:] != MAGIC:
+            raise SnapshotFormatError('incomplete snapshot file: %s' % self._file.name)
+
+        offset, length = _TRAILER.unpack(trailer[:_TRAILER.size])
+
+        try:
+            index = _decode(zlib.decompress(self._read(offset, length)))
+            meta, keys = index['meta'], index['keys']
+        except (zlib.error, ValueError, KeyError, TypeError):
+            raise SnapshotFormatError('corrupt snapshot index: %s' % self._file.name)
+
+        self.meta = meta
+        self._keys = [key for key, _, _ in keys]
+        self._index = {key: (offset, length) for key, offset, length in keys}
+
+    # =========================================================================
+    #
+    #                             OPERATORS
+    #
+    # =========================================================================
+
+    def __getitem__(self, key):
+        offset, length = self._index[key]
+        return _decode(zlib.decompress(self._read(offset, length)))
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,271 @@
+# Copyright 2014-present, Apstra, Inc. All rights reserved.
+#
+# This source code is licensed under End User License Agreement found in the
+# LICENSE file at http://www.apstra.com/community/eula
+
+from collections import OrderedDict
+from itertools import groupby
+
+from apstra.aosom.exc import AccessValueError, DuplicateError, FlushError
+from apstra.aosom.workers import run_concurrently
+
+__all__ = [
+    'UnitOfWork'
+]
+
+
+class QueuedOperation(object):
+    """
+    A single queued item operation within a :class:`UnitOfWork`.  The public
+    attributes are:
+
+        * :attr:`action` - one of 'create', 'write', or 'delete'
+        * :attr:`item` - the :class:`CollectionItem` instance
+        * :attr:`value` - the item value for 'create' and 'write' actions
+    """
+    def __init__(self, action, item, value=None):
+        self.action = action
+        self.item = item
+        self.value = value
+
+    @property
+    def rank(self):
+        return self.item.collection.DEPENDENCY_RANK
+
+    def __str__(self):
+        return '%s %s/%s' % (self.action, self.item.collection.URI, self.item.name)
+
+    __repr__ = __str__
+
+
+class UnitOfWork(object):
+    """
+    The UnitOfWork is used to queue create, write and delete operations on collection
+    items, and then execute them together.  For example::
+
+        uow = aos.unit_of_work()
+        uow.create(aos.IpPools['pod-1-loopbacks'], dict(subnets=[dict(network='10.1.0.0/24')]))
+        uow.write(aos.AsnPools['pod-1-asns'], asn_value)
+        uow.delete(aos.Blueprints['old-pod'])
+        uow.flush()
+
+    The UnitOfWork can also be used as a context manager, in which case the queued
+    operations are flushed when the block exits without an exception.
+
+    Operations queued for the same item are coalesced; for example a create followed
+    by writes results in a single create of the last value.  When flushed, deletes are
+    executed first, in decreasing :data:`Collection.DEPENDENCY_RANK` order, followed by
+    creates and writes in increasing rank order.  Operations of the same rank are
+    executed concurrently, with at most `max_workers` requests in flight.  If any operation
+    fails, the operations of the following ranks are not executed, and remain queued.  The
+    collection caches are updated once all operations have completed.
+    """
+    def __init__(self, session, max_workers=None, readback=False):
+        """
+        Args:
+            session: the :class:`Session` instance
+            max_workers (int): maximum number of concurrent requests
+            readback (bool): passed to :meth:`CollectionItem.write`
+        """
+        self.session = session
+        self.max_workers = max_workers
+        self.readback = readback
+        self._ops = OrderedDict()
+
+    # =========================================================================
+    #
+    #                             PROPERTIES
+    #
+    # =========================================================================
+
+    @property
+    def pending(self):
+        """
+        Returns:
+            The list of queued :class:`QueuedOperation`
+        """
+        return list(self._ops.values())
+
+    # =========================================================================
+    #
+    #                             PUBLIC METHODS
+    #
+    # =========================================================================
+
+    def create(self, item, value=None):
+        """
+        Queues the creation of `item`.
+
+        Args:
+            item (CollectionItem): the item to create
+            value (dict): the item value; if not provided the current item value is used
+
+        Raises:
+            DuplicateError: the item exists, or is already queued for create
+            AccessValueError: the item is queued for delete
+        """
+        if item.exists:
+            item._raise_duplicate(item.name)
+
+        queued = self._queued(item)
+        if queued:
+            raise DuplicateError("'%s' already queued for %s" % (item.name, queued.action))
+
+        self._queue(QueuedOperation('create', item, value))
+
+    def write(self, item, value=None):
+        """
+        Queues the write of `item`.  If the item does not exist, then this is queued as
+        a create.  A write of an item already queued for create or write replaces the
+        queued value; when no `value` is provided, the queued value is kept.
+
+        Args:
+            item (CollectionItem): the item to write
+            value (dict): the item value; if not provided the current item value is used
+
+        Raises:
+            AccessValueError: the item is queued for delete
+        """
+        queued = self._queued(item)
+        if queued:
+            if value is not None:
+                queued.value = value
+            return
+
+        self._queue(QueuedOperation(
+            'write' if item.exists else 'create', item, value))
+
+    def delete(self, item):
+        """
+        Queues the delete of `item`.  A delete of an item queued for create
+        removes the queued create; a delete of an item queued for write
+        replaces the write.
+
+        Args:
+            item (CollectionItem): the item to delete
+
+        Raises:
+            AccessValueError: the item is already queued for delete
+        """
+        queued = self._queued(item)
+        if queued and queued.action == 'create':
+            del self._ops[self._key(item)]
+            return
+
+        self._queue(QueuedOperation('delete', item))
+
+    def discard(self):
+        """
+        Removes all queued operations without executing them.
+        """
+        self._ops.clear()
+
+    def flush(self):
+        """
+        Executes all queued operations; see the class description for the ordering and
+        concurrency.  The queue is empty once this method returns, other than the
+        operations not executed because of a failure.
+
+        Returns:
+            The list of :data:`WorkResult` for each executed operation, where the
+            `arg` is the :class:`QueuedOperation`.
+
+        Raises:
+            FlushError: one or more of the operations failed.  The `errors` attribute
+                contains the failed results, and the `not_attempted` attribute the
+                operations that were not executed.
+        """
+        ops, self._ops = self.pending, OrderedDict()
+
+        deletes = sorted((op for op in ops if op.action == 'delete'),
+                         key=lambda op: -op.rank)
+
+        updates = sorted((op for op in ops if op.action != 'delete'),
+                         key=lambda op: op.rank)
+
+        done, errors, executed = [], [], set()
+
+        for _, phase in groupby(deletes + updates, key=lambda op: (op.action == 'delete', op.rank)):
+            if errors:
+                break
+
+            phase = list(phase)
+            executed.update(phase)
+            for result in run_concurrently(self._execute, phase, self.max_workers):
+                (errors if result.error else done).append(result)
+
+        # the operations not executed remain queued, in their original order
+
+        not_attempted = [op for op in ops if op not in executed]
+        for op in not_attempted:
+            self._queue(op)
+
+        # now update the collection caches, all from the calling thread
+
+        for result in done:
+            op = result.arg
+            collection = op.item.collection
+            if op.action == 'create':
+                collection += op.item
+            elif op.action == 'delete':
+                collection -= op.item
+            else:
+                collection._update_item(op.item.datum)
+
+        if errors:
+            raise FlushError(errors, not_attempted)
+
+        return done
+
+    # =========================================================================
+    #
+    #                             PRIVATE METHODS
+    #
+    # =========================================================================
+
+    @staticmethod
+    def _key(item):
+        return item.collection.url, item.name
+
+    def _queued(self, item):
+        queued = self._ops.get(self._key(item))
+        if queued and queued.action == 'delete':
+            raise AccessValueError("'%s' already queued for delete" % item.name)
+
+        return queued
+
+    def _queue(self, op):
+        self._ops[self._key(op.item)] = op
+
+    def _execute(self, op):
+        item = op.item
+
+        if op.action == 'create':
+            item._create_prepare(op.value)
+            item._create_request()
+
+        elif op.action == 'write':
+            item._write_request(op.value, readback=self.readback)
+
+        else:
+            item._delete_request()
+
+        return item
+
+    # =========================================================================
+    #
+    #                             OPERATORS
+    #
+    # =========================================================================
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.flush()
+        else:
+            self.discard()
+
+    def __len__(self):
+        return len(self._ops)
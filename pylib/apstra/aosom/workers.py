@@ -0,0 +1,87 @@
+# Copyright 2014-present, Apstra, Inc. All rights reserved.
+#
+# This source code is licensed under End User License Agreement found in the
+# LICENSE file at http://www.apstra.com/community/eula
+
+"""
+Bounded concurrency for issuing many AOS-server API requests at once.  The
+AOS API calls are I/O bound, so a pool of threads sharing the session
+:attr:`Api.requests` is used.
+"""
+
+import time
+import threading
+from collections import namedtuple
+
+__all__ = [
+    'DEFAULT_MAX_WORKERS',
+    'WorkResult',
+    'run_concurrently'
+]
+
+#: the default maximum number of concurrent API requests
+DEFAULT_MAX_WORKERS = 8
+
+#: the outcome of calling a function on one argument
+#:   * `arg` - the argument given to the function
+#:   * `value` - the function return value, `None` if an exception was raised
+#:   * `error` - the exception raised, `None` if the function returned
+#:   * `elapsed` - the call duration in seconds
+
+WorkResult = namedtuple('WorkResult', ['arg', 'value', 'error', 'elapsed'])
+
+
+def run_concurrently(func, args, max_workers=None):
+    """
+    Calls `func` on each of the `args` using at most `max_workers` concurrent
+    threads, yielding a :data:`WorkResult` as each call completes.  An exception
+    raised by `func` is returned in the result rather than aborting the other calls.
+
+    The `args` are consumed lazily: at most twice `max_workers` arguments are taken
+    ahead of the results consumed by the caller.
+
+    Args:
+        func (callable): called with a single argument
+        args (iterable): the arguments
+        max_workers (int): the maximum number of concurrent calls, defaults to
+            :data:`DEFAULT_MAX_WORKERS`
+
+    Returns:
+        generator of :data:`WorkResult`, in order of completion
+    """
+    # imported here to keep the package import time down
+
+    from multiprocessing.pool import ThreadPool
+
+    def call(arg):
+        start = time.time()
+        try:
+            return WorkResult(arg, func(arg), None, time.time() - start)
+        except Exception as exc:
+            return WorkResult(arg, None, exc, time.time() - start)
+
+    # the pool takes the arguments as fast as it is able to, so they are fed
+    # through a semaphore that is released as each result is consumed.
+
+    max_workers = max_workers or DEFAULT_MAX_WORKERS
+    outstanding = threading.Semaphore(2 * max_workers)
+    stopped = threading.Event()
+
+    def feed():
+        for arg in args:
+            outstanding.acquire()
+            if stopped.is_set():
+                return
+            yield arg
+
+    pool = ThreadPool(processes=max_workers)
+    try:
+        for result in pool.imap_unordered(call, feed()):
+            outstanding.release()
+            yield result
+    finally:
+        # let the feed finish, so that the pool can be terminated
+
+        stopped.set()
+        outstanding.release()
+        pool.terminate()
@@ -15,7 +15,6 @@ packages = find_packages(libdir)
 
 setup(
     name="aos-pyez",
-    namespace_packages=['apstra'],
     url="https://github.com/Apstra/aos-pyez",
     version="0.6.0",
     author="Jeremy Schulman",
@@ -4,8 +4,11 @@
 # LICENSE file at http://www.apstra.com/community/eula
 
 
+from copy import deepcopy
+
 from utils.common import *
 from apstra.aosom.exc import *
+from apstra.aosom.blueprint_modules.diff import ContentsDigest, diff_contents
 
 
 class TestBlueprintModules(AosPyEzCommonTestCase):
@@ -131,6 +134,15 @@ class TestBlueprintModules(AosPyEzCommonTestCase):
         p_0.update(patch_data)
         self.assertEquals(p_0.value, patch_data)
 
+        # patch without readback, merges the PATCH into the local value
+        # without an additional GET
+
+        n_requests = len(self.adapter.request_history)
+        patch_data = dict(state='VA')
+        p_0.update(patch_data, readback=False)
+        self.assertEquals(len(self.adapter.request_history) - n_requests, 1)
+        self.assertEquals(p_0.value, dict(name='jeremy', state='VA'))
+
         # patch, mock an error
         self.adapter.register_uri('PATCH', p_0.url, status_code=400)
         try:
@@ -139,3 +151,105 @@ class TestBlueprintModules(AosPyEzCommonTestCase):
             pass
         else:
             self.fail("SessionRqstError not raised as expected")
+
+    def test_blueprint_graph(self):
+        contents = dict(self.bp_item_data, nodes={
+            'spine-1': dict(id='spine-1', type='system', role='spine', label='spine_1'),
+            'spine-2': dict(id='spine-2', type='system', role='spine', label='spine_2'),
+            'leaf-1': dict(id='leaf-1', type='system', role='leaf', label='leaf_1',
+                           tags=['rack-1', 'pod-1'], attrs=dict(asn=[65001])),
+            'leaf-1-swp1': dict(id='leaf-1-swp1', type='interface', label='swp1'),
+        }, relationships=[
+            dict(id='r1', type='link', source_id='leaf-1', target_id='spine-1'),
+            dict(id='r2', type='link', source_id='leaf-1', target_id='spine-2'),
+            dict(id='r3', type='hosted_interfaces', source_id='leaf-1', target_id='leaf-1-swp1'),
+        ])
+
+        gets = []
+
+        def get_contents(request, context):
+            gets.append(request.url)
+            context.status_code = 200
+            context.headers['ETag'] = '"v1"'
+            return contents
+
+        self.adapter.register_uri('GET', self.bp_item.url, json=get_contents)
+
+        # nothing is retrieved until the graph is used
+
+        graph = self.bp_item.graph
+        self.assertEquals(gets, [])
+
+        self.assertEquals(len(graph), 4)
+        self.assertEquals(graph['leaf-1']['label'], 'leaf_1')
+        self.assertIsNone(graph.node('no-such-node'))
+        self.assertEquals(len(gets), 1)
+
+        # indexes are built on first use only
+
+        self.assertEquals(graph._indexes, {})
+        self.assertEquals(sorted(n['id'] for n in graph.by_role('spine')), ['spine-1', 'spine-2'])
+        self.assertEquals(sorted(graph._indexes), ['role'])
+
+        self.assertEquals([n['id'] for n in graph.find(type='system', role='leaf')], ['leaf-1'])
+        self.assertEquals([n['id'] for n in graph.by_label('swp1')], ['leaf-1-swp1'])
+        self.assertEquals(graph.by_type('no-such-type'), [])
+
+        # list and dict values are indexed too
+
+        self.assertEquals([n['id'] for n in graph.index('tags')[('rack-1', 'pod-1')]], ['leaf-1'])
+        self.assertEquals([n['id'] for n in graph.find(tags=['rack-1', 'pod-1'])], ['leaf-1'])
+        self.assertEquals([n['id'] for n in graph.find(attrs=dict(asn=[65001]))], ['leaf-1'])
+        self.assertEquals(graph.find(tags=['pod-1', 'rack-1']), [])
+
+        # link traversal
+
+        self.assertEquals(sorted(n['id'] for n in graph.neighbors('leaf-1', rel_type='link')),
+                          ['spine-1', 'spine-2'])
+        self.assertEquals([n['id'] for n in graph.neighbors('spine-1')], ['leaf-1'])
+        self.assertEquals(graph.neighbors('spine-1', direction='out'), [])
+        self.assertEquals([rel['id'] for rel, _ in graph.edges('leaf-1-swp1', direction='in')], ['r3'])
+
+        # an unchanged refresh keeps the indexes
+
+        self.adapter.register_uri('GET', self.bp_item.url, status_code=304)
+        graph.refresh()
+        self.assertEquals(sorted(graph._indexes), ['attrs', 'label', 'role', 'tags', 'type'])
+        self.assertIsNotNone(graph._adjacency)
+
+    def test_blueprint_diff(self):
+        before = dict(self.bp_item_data, nodes={
+            'spine-1': dict(id='spine-1', type='system', label='spine_1'),
+            'leaf-1': dict(id='leaf-1', type='system', label='leaf_1'),
+            'leaf-2': dict(id='leaf-2', type='system', label='leaf_2'),
+        }, relationships=[
+            dict(id='r1', type='link', source_id='leaf-1', target_id='spine-1'),
+            dict(id='r2', type='link', source_id='leaf-2', target_id='spine-1'),
+        ])
+
+        after = deepcopy(before)
+        after['nodes']['leaf-1']['label'] = 'leaf_one'
+        del after['nodes']['leaf-2']
+        after['nodes']['leaf-3'] = dict(id='leaf-3', type='system', label='leaf_3')
+        after['relationships'][1] = dict(id='r3', type='link', source_id='leaf-3',
+                                         target_id='spine-1')
+        after['errors'] = ['i_am_an_error']
+
+        expected = ((['leaf-3'], ['leaf-2'], ['leaf-1']), (['r3'], ['r2'], []), ['errors'])
+
+        # the same result from the contents, the digests, or a mix
+
+        self.assertEquals(diff_contents(before, after), expected)
+        self.assertEquals(diff_contents(ContentsDigest(before), ContentsDigest(after)), expected)
+        self.assertEquals(diff_contents(ContentsDigest(before), after), expected)
+
+        # identical versions
+
+        self.assertEquals(diff_contents(before, deepcopy(before)), (([], [], []), ([], [], []), []))
+        self.assertEquals(ContentsDigest(before), ContentsDigest(deepcopy(before)))
+        self.assertNotEquals(ContentsDigest(before), ContentsDigest(after))
+
+        # compared with the current blueprint contents
+
+        self.adapter.register_uri('GET', self.bp_item.url, json=after)
+        self.assertEquals(self.bp_item.diff(ContentsDigest(before)), expected)
@@ -198,6 +198,7 @@ class TestCollectionItems(AosPyEzCommonTestCase):
 
         # mock a bad PUT
         self.adapter.register_uri('PUT', item.url, status_code=400)
+        item.value['subnets'].append(dict(network="1.1.2.0/24"))
         try:
             item.write()
         except SessionRqstError:
@@ -215,3 +216,173 @@ class TestCollectionItems(AosPyEzCommonTestCase):
 
         new_item.write(value={ip_pools.LABEL: new_item.name})
         self.assertEquals(new_item.id, 'fake_id')
+
+    @mock_server_json_data_named('ip_pools', testcase='*')
+    def test_collection_item_write_readback(self, json_data):
+        # use the IpPools as an example collection
+        ip_pools = self.aos.IpPools
+        self.adapter.register_uri('GET', ip_pools.url, json=json_data[0])
+        _ = ip_pools.names
+
+        # mock the PUT, and the GET to return what was written
+
+        for item in ip_pools:
+            updated = copy(item.value)
+            updated['tags'] = ['bulk']
+            self.adapter.register_uri('PUT', item.url, status_code=200)
+            self.adapter.register_uri('GET', item.url, json=updated)
+
+        def bulk_update(tags, **kwargs):
+            n_requests = len(self.adapter.request_history)
+            for each in ip_pools:
+                value = copy(each.value)
+                value['tags'] = tags
+                each.write(value, **kwargs)
+                self.assertEquals(each.value['tags'], tags)
+            return len(self.adapter.request_history) - n_requests
+
+        n_items = len(ip_pools.names)
+
+        # default write is a PUT followed by a GET
+
+        self.assertEquals(bulk_update(['bulk']), 2 * n_items)
+
+        # without readback only the PUT is made, and the value written
+        # becomes the local value
+
+        self.assertEquals(bulk_update(['bulk-2'], readback=False), n_items)
+        item = ip_pools[ip_pools.names[0]]
+        value = copy(item.value)
+        value['tags'] = ['local']
+        item.write(value, readback=False)
+        self.assertTrue(item.exists)
+        self.assertEquals(item.value, value)
+        self.assertIsNot(item.value, value)
+
+        # when the server returns the updated item in the PUT response, that
+        # value is used even with readback
+
+        from_server = copy(item.value)
+        from_server['tags'] = ['from-server']
+        self.adapter.register_uri('PUT', item.url, json=from_server)
+        n_requests = len(self.adapter.request_history)
+        item.value['tags'] = ['from-client']
+        item.write()
+        self.assertEquals(len(self.adapter.request_history) - n_requests, 1)
+        self.assertEquals(item.value['tags'], ['from-server'])
+
+    @mock_server_json_data_named('ip_pools', testcase='*')
+    def test_collection_item_write_changes(self, json_data):
+        # use the IpPools as an example collection
+        ip_pools = self.aos.IpPools
+        self.adapter.register_uri('GET', ip_pools.url, json=json_data[0])
+
+        # the baselines of the changes are only parsed from the digest when needed
+
+        item = ip_pools[ip_pools.names[0]]
+        self.assertIsNotNone(ip_pools._baselines_content)
+        self.assertEquals(item.changes, {})
+        self.assertIsNone(ip_pools._baselines_content)
+
+        # nothing changed, so no request is made
+
+        n_requests = len(self.adapter.request_history)
+        item.write()
+        self.assertEquals(len(self.adapter.request_history), n_requests)
+
+        # the collection does not support PATCH, so a PUT with the complete
+        # value is made
+
+        def do_put(request, context):
+            context.status_code = 200
+            self.assertEquals(request.json(), item.value)
+            return {}
+
+        self.adapter.register_uri('PUT', item.url, json=do_put)
+        item.value['tags'] = ['put']
+        self.assertEquals(item.changes, dict(tags=['put']))
+        item.write(readback=False)
+        self.assertEquals(item.changes, {})
+
+        # the changes are relative to the server value, not to when the item
+        # instance was obtained, so an edit of the cached value is written
+
+        item = ip_pools[item.name]
+        item.value['tags'] = ['edited']
+        n_requests = len(self.adapter.request_history)
+        ip_pools[item.name].write(readback=False)
+        self.assertEquals(len(self.adapter.request_history) - n_requests, 1)
+        self.assertEquals(self.adapter.last_request.json()['tags'], ['edited'])
+        self.assertEquals(ip_pools[item.name].changes, {})
+
+        # now enable PATCH; only the modified paths are sent
+
+        ip_pools.WRITE_PATCH = True
+        del item.value['status']
+        item.value['tags'] = ['patch']
+
+        def do_patch(request, context):
+            context.status_code = 200
+            self.assertEquals(request.json(), dict(status=None, tags=['patch']))
+            return {}
+
+        self.adapter.register_uri('PATCH', item.url, json=do_patch)
+        item.write(readback=False)
+        self.assertEquals(item.value['tags'], ['patch'])
+        self.assertNotIn('status', item.value)
+        self.assertEquals(item.changes, {})
+
+        # setting a value to null cannot be expressed as a PATCH, so
+        # the complete value is PUT
+
+        item.value['tags'] = None
+        self.assertIsNone(item.changes)
+        item.write(readback=False)
+        self.assertEquals(self.adapter.last_request.method, 'PUT')
+
+        # the server rejects the PATCH method, fall back to PUT
+
+        self.adapter.register_uri('PATCH', item.url, status_code=405)
+        item.value['tags'] = ['fallback']
+        item.write(readback=False)
+        self.assertEquals(self.adapter.last_request.method, 'PUT')
+        self.assertFalse(ip_pools.WRITE_PATCH)
+
+    @mock_server_json_data_named('ip_pools', testcase='*')
+    def test_collection_item_write_updates_collection(self, json_data):
+        # use the IpPools as an example collection
+        ip_pools = self.aos.IpPools
+        self.adapter.register_uri('GET', ip_pools.url, json=json_data[0])
+
+        old_name = ip_pools.names[0]
+        item = ip_pools[old_name]
+        self.adapter.register_uri('PUT', item.url, json={})
+
+        # the collection is re-indexed by the value written
+
+        renamed = copy(item.value)
+        renamed[ip_pools.LABEL] = 'renamed-pool'
+        renamed['tags'] = ['renamed']
+        item.write(renamed, readback=False)
+
+        self.assertEquals(item.name, 'renamed-pool')
+        self.assertNotIn(old_name, ip_pools)
+        self.assertIn('renamed-pool', ip_pools.names)
+        self.assertEquals(ip_pools.find(uid=item.id).name, 'renamed-pool')
+
+        # another instance of the item has no changes, so writing it does not
+        # undo the first write
+
+        again = ip_pools['renamed-pool']
+        self.assertEquals(again.value['tags'], ['renamed'])
+        self.assertEquals(again.changes, {})
+
+        n_requests = len(self.adapter.request_history)
+        again.write()
+        self.assertEquals(len(self.adapter.request_history), n_requests)
+
+        # as is the value read back from the server
+
+        self.adapter.register_uri('GET', item.url, json=dict(renamed, tags=['read']))
+        item.read()
+        self.assertEquals(ip_pools['renamed-pool'].value['tags'], ['read'])
@@ -9,9 +9,19 @@
 #
 
 
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+import zipfile
+from os import path
+from mock import patch
+
 from utils.common import *
 
-from apstra.aosom.collection_mapper import CollectionMapper, MultiCollectionMapper
+from apstra.aosom.collection_mapper import CollectionMapper, MultiCollectionMapper, PathSpec
 from apstra.aosom.exc import *
 
 
@@ -250,3 +260,298 @@ class TestCollection(AosPyEzCommonTestCase):
         ))
 
         xfm.from_uid(to_ids)
+
+    @mock_server_json_data_named('ip_pools', testcase='*')
+    def test_collection_backup_restore(self, json_data):
+        ip_pools = self.aos.IpPools
+        self.adapter.register_uri('GET', ip_pools.url, json=json_data[0])
+
+        # each item body is stored as-is, so use a distinct formatting
+
+        raw_items = {}
+        for item in ip_pools:
+            raw_items[item.name] = json.dumps(item.value, indent=7).encode()
+            self.adapter.register_uri('GET', item.url, content=raw_items[item.name])
+
+        tmpdir = tempfile.mkdtemp()
+        try:
+            saved = ip_pools.backup(dirpath=tmpdir, max_workers=2)
+            self.assertEquals(sorted(saved), sorted(ip_pools.names))
+            for name, raw in raw_items.items():
+                with open(path.join(tmpdir, name + '.json'), 'rb') as ifile:
+                    self.assertEquals(ifile.read(), raw)
+
+            archive = path.join(tmpdir, 'ip_pools.zip')
+            ip_pools.backup(archive=archive)
+            with zipfile.ZipFile(archive) as zipf:
+                self.assertEquals(sorted(zipf.namelist()),
+                                  sorted(name + '.json' for name in ip_pools.names))
+                for name, raw in raw_items.items():
+                    self.assertEquals(zipf.read(name + '.json'), raw)
+
+            # restore from the directory, with one item changed and a new one
+
+            a_name = ip_pools.names[0]
+            a_item = ip_pools[a_name]
+            changed = json.loads(raw_items[a_name].decode())
+            changed['tags'] = ['restored']
+            with open(path.join(tmpdir, a_name + '.json'), 'w') as ofile:
+                json.dump(changed, ofile)
+
+            with open(path.join(tmpdir, 'new-pool.json'), 'w') as ofile:
+                json.dump(dict(subnets=[]), ofile)
+
+            self.adapter.register_uri('PUT', a_item.url, json={})
+            self.adapter.register_uri('POST', ip_pools.url, json=dict(id='new-pool-id'))
+
+            restored = ip_pools.restore(dirpath=tmpdir, max_workers=2)
+            self.assertEquals(sorted(restored), sorted(ip_pools.names))
+            self.assertEquals(ip_pools[a_name].value['tags'], ['restored'])
+            self.assertEquals(ip_pools['new-pool'].id, 'new-pool-id')
+
+            # restoring the archive writes only the item that now differs
+
+            n_requests = len(self.adapter.request_history)
+            ip_pools.restore(archive=archive)
+            methods = [rqst.method for rqst in self.adapter.request_history[n_requests:]]
+            self.assertEquals(methods, ['PUT'])
+
+            # a backup of another AOS-server has other item IDs; restore it from
+            # the current working directory
+
+            foreign_dir = path.join(tmpdir, 'foreign')
+            os.mkdir(foreign_dir)
+            with open(path.join(foreign_dir, a_name + '.json'), 'w') as ofile:
+                json.dump(dict(changed, id='foreign-id', tags=['foreign']), ofile)
+            with open(path.join(foreign_dir, 'other-pool.json'), 'w') as ofile:
+                json.dump(dict(id='foreign-new-id', display_name='other-pool', subnets=[]), ofile)
+
+            self.adapter.register_uri('POST', ip_pools.url, json=dict(id='other-pool-id'))
+
+            n_requests = len(self.adapter.request_history)
+            cwd = os.getcwd()
+            os.chdir(foreign_dir)
+            try:
+                restored = ip_pools.restore()
+            finally:
+                os.chdir(cwd)
+
+            self.assertEquals(sorted(restored), sorted([a_name, 'other-pool']))
+            written = {rqst.method: rqst.json() for rqst in self.adapter.request_history[n_requests:]}
+            self.assertEquals(written['PUT']['id'], a_item.id)
+            self.assertNotIn('id', written['POST'])
+            self.assertEquals(ip_pools[a_name].id, a_item.id)
+            self.assertEquals(ip_pools[a_name].value['tags'], ['foreign'])
+            self.assertEquals(ip_pools['other-pool'].id, 'other-pool-id')
+            self.assertNotIn('foreign-id', ip_pools._baselines)
+
+            # a failure to retrieve one item does not stop the others
+
+            self.adapter.register_uri('GET', a_item.url, status_code=400)
+            try:
+                ip_pools.backup(dirpath=tmpdir, names=raw_items.keys())
+            except BulkRqstError as exc:
+                self.assertEquals([r.arg[ip_pools.LABEL] for r in exc.errors], [a_name])
+            else:
+                self.fail("BulkRqstError not raised as expected")
+
+            with self.assertRaises(BulkRqstError):
+                ip_pools.backup(archive=path.join(tmpdir, 'failed.zip'))
+
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_collection_mapper_batch_10k(self):
+        ip_pools = self.aos.IpPools
+        self.adapter.register_uri('GET', ip_pools.url, json=dict(items=[
+            dict(id='id-%d' % i, display_name='pool-%d' % i)
+            for i in range(500)]))
+
+        uids = [random.choice(ip_pools.cache['list'])['id'] for _ in range(10000)]
+
+        # baseline: a find() per value
+
+        start = time.time()
+        expected = [ip_pools.find(uid=uid).name for uid in uids]
+        per_value = time.time() - start
+
+        # batch translation does not construct any collection items
+
+        xf = CollectionMapper(ip_pools)
+        with patch.object(ip_pools, 'find', side_effect=AssertionError('find called')):
+            start = time.time()
+            labels = xf.translate_uids(uids)
+            batch = time.time() - start
+
+            self.assertEquals(labels, expected)
+            self.assertEquals(xf.translate_labels(labels), uids)
+            self.assertEquals(xf.from_uid(dict(items=uids, one=uids[0])),
+                              dict(items=expected, one=expected[0]))
+
+        self.assertLess(batch, per_value)
+
+        # the lookup tables are rebuilt when the collection changes
+
+        new_pool = ip_pools['new-pool']
+        new_pool.datum = dict(id='new-id', display_name='new-pool')
+        ip_pools += new_pool
+        self.assertEquals(xf.translate_uids(['new-id']), ['new-pool'])
+
+        ip_pools -= new_pool
+        try:
+            xf.translate_uids(['new-id'])
+        except AccessValueError:
+            pass
+        else:
+            self.fail("AccessValueError not raised as expected")
+
+        # and when an item is renamed by a write
+
+        pool = ip_pools['pool-1']
+        self.adapter.register_uri('PUT', pool.url, json={})
+        pool.write(dict(pool.value, display_name='renamed-pool'), readback=False)
+        self.assertEquals(xf.translate_uids(['id-1']), ['renamed-pool'])
+        self.assertEquals(xf.translate_labels(['renamed-pool']), ['id-1'])
+        with self.assertRaises(AccessValueError):
+            xf.translate_labels(['pool-1'])
+
+    def test_collection_mapper_paths(self):
+        ip_pools = self.aos.IpPools
+        asn_pools = self.aos.AsnPools
+        self.adapter.register_uri('GET', ip_pools.url, json=dict(items=[
+            dict(id='ip-%d' % i, display_name='ip-pool-%d' % i) for i in range(3)]))
+        self.adapter.register_uri('GET', asn_pools.url, json=dict(items=[
+            dict(id='asn-%d' % i, display_name='asn-pool-%d' % i) for i in range(3)]))
+
+        payload = dict(
+            name='leaf_loopback_ips',
+            links=[dict(pool_id='ip-0', asns=['asn-1', 'asn-2']),
+                   dict(pool_id='ip-2', asns=[]),
+                   dict(pool_id=None)],
+            first=dict(pool_id='ip-1'))
+
+        xf = CollectionMapper(ip_pools)
+        paths = ['links.*.pool_id', 'first.pool_id', 'not.there']
+        got = xf.from_uid(payload, paths=paths)
+
+        self.assertEquals([link['pool_id'] for link in got['links']],
+                          ['ip-pool-0', 'ip-pool-2', None])
+        self.assertEquals(got['first'], dict(pool_id='ip-pool-1'))
+        self.assertEquals(got['name'], 'leaf_loopback_ips')
+
+        # the original payload is unchanged, and the round trip is lossless
+
+        self.assertEquals(payload['links'][0]['pool_id'], 'ip-0')
+        self.assertEquals(xf.from_label(got, paths=paths), payload)
+
+        # list index, and compiled once per distinct paths
+
+        got = xf.from_uid(payload, paths=['links.1.pool_id'])
+        self.assertEquals([link['pool_id'] for link in got['links']], ['ip-0', 'ip-pool-2', None])
+        self.assertEquals(len(xf._specs), 2)
+
+        # multiple ID types
+
+        xfm = MultiCollectionMapper(self.aos, dict(ip='IpPools', asn='AsnPools'))
+        spec = PathSpec({'links.*.pool_id': 'ip', 'links.*.asns': 'asn'})
+        got = xfm.from_uid(payload, paths=spec)
+        self.assertEquals(got['links'][0], dict(pool_id='ip-pool-0', asns=['asn-pool-1', 'asn-pool-2']))
+        self.assertEquals(xfm.from_label(got, paths=spec), payload)
+
+        try:
+            PathSpec(['links.*', 'links.*.pool_id'])
+        except AccessValueError:
+            pass
+        else:
+            self.fail("AccessValueError not raised as expected")
+
+    @mock_server_json_data_named(named='test_resources_in_use', testcase='TestMiscCollections')
+    def test_collection_multi_mapper_warm(self, json_data):
+        ip_pools = self.aos.IpPools
+        asn_pools = self.aos.AsnPools
+
+        self.adapter.register_uri('GET', ip_pools.url, json=json_data[0])
+        self.adapter.register_uri('GET', asn_pools.url, json=json_data[1])
+
+        def gets():
+            return [rqst.url for rqst in self.adapter.request_history
+                    if rqst.method == 'GET' and '/resources/' in rqst.url]
+
+        # each collection is retrieved once, when the mapper is created, even
+        # when used by more than one ID type
+
+        xfm = MultiCollectionMapper(self.aos, dict(
+            ip_items='IpPools', more_ip_items='IpPools', asn_items='AsnPools'))
+
+        self.assertEquals(sorted(gets()), sorted([ip_pools.url, asn_pools.url]))
+
+        # lookup tables are shared by mappers of the same collection
+
+        tables = xfm.xfs['ip_items']._lookup_tables()
+        self.assertIs(xfm.xfs['more_ip_items']._lookup_tables(), tables)
+        self.assertIs(CollectionMapper(ip_pools)._lookup_tables(), tables)
+
+        xfm.from_uid(xfm.from_label(dict(ip_items=ip_pools.names, asn_items=asn_pools.names)))
+        self.assertEquals(len(gets()), 2)
+
+        # lazy mapper, retrieval failure
+
+        ext_routers = self.aos.ExternalRouters
+        self.adapter.register_uri('GET', ext_routers.url, status_code=500)
+
+        xfm = MultiCollectionMapper(self.aos, dict(
+            ip_items='IpPools', rtr_items='ExternalRouters'), prefetch=False)
+
+        self.assertEquals(len(gets()), 2)
+
+        try:
+            xfm.warm()
+        except BulkRqstError as exc:
+            self.assertEquals([result.arg for result in exc.errors], [ext_routers])
+        else:
+            self.fail("BulkRqstError not raised as expected")
+
+    def test_collection_subscribe(self):
+        ip_pools = self.aos.IpPools
+        self.adapter.register_uri('GET', ip_pools.url, json=dict(items=[
+            dict(id='id-%d' % i, display_name='pool-%d' % i) for i in range(3)]))
+
+        events = []
+
+        def on_change(collection, event, item, previous):
+            self.assertIs(collection, ip_pools)
+            events.append((event, item and item['display_name'], previous and previous['display_name']))
+
+        ip_pools.subscribe(on_change)
+        xf = CollectionMapper(ip_pools)
+        tables = xf._lookup_tables()
+
+        new_pool = ip_pools['new-pool']
+        new_pool.datum = dict(id='new-id', display_name='new-pool')
+        ip_pools += new_pool
+        ip_pools._update_item(dict(id='new-id', display_name='renamed-pool'))
+        ip_pools -= ip_pools['pool-0']
+
+        self.assertEquals(events, [
+            ('digest', None, None),
+            ('add', 'new-pool', None),
+            ('update', 'renamed-pool', 'new-pool'),
+            ('remove', 'pool-0', None)])
+
+        # the mapper tables are updated in place, not rebuilt
+
+        self.assertIs(xf._lookup_tables(), tables)
+        self.assertEquals(xf.translate_uids(['new-id', 'id-1']), ['renamed-pool', 'pool-1'])
+        self.assertEquals(xf.translate_labels(['renamed-pool']), ['new-id'])
+        for stale in (['new-pool'], ['pool-0']):
+            self.assertRaises(AccessValueError, xf.translate_labels, stale)
+
+        # a digest discards the tables
+
+        ip_pools.digest()
+        self.assertIsNot(xf._lookup_tables(), tables)
+        self.assertEquals(xf.translate_labels(['pool-0']), ['id-0'])
+
+        ip_pools.unsubscribe(on_change)
+        ip_pools.digest()
+        self.assertEquals(len(events), 5)
@@ -0,0 +1,67 @@
+# Copyright 2014-present, Apstra, Inc. All rights reserved.
+#
+# This source code is licensed under End User License Agreement found in the
+# LICENSE file at http://www.apstra.com/community/eula
+
+import math
+import unittest
+from array import array
+
+from apstra.aosom.columnar import service_table, ColumnTable, _numpy
+from apstra.aosom.session_modules.devices import ServiceResult
+
+RESULTS = [
+    ServiceResult('leaf-1', 'interface', [
+        dict(interface='swp1', counters=dict(rx_bytes=100, tx_bytes=1.5), up=True),
+        dict(interface='swp2', counters=dict(rx_bytes=5000), up=False)], None),
+    ServiceResult('leaf-2', 'interface', None, RuntimeError('no route to host')),
+    ('leaf-3', 'interface', [
+        dict(interface='swp1', counters=dict(rx_bytes=7000, tx_bytes=2.5), up=True,
+             neighbors=['spine-1'])]),
+]
+
+
+class TestColumnar(unittest.TestCase):
+
+    def test_service_table_plain(self):
+        table = service_table(RESULTS, use_numpy=False)
+
+        self.assertIsInstance(table, ColumnTable)
+        self.assertFalse(table.numpy)
+        self.assertEquals(len(table), 3)
+        self.assertEquals(table.fields, [
+            'device', 'service', 'counters.rx_bytes', 'counters.tx_bytes', 'interface', 'up'])
+
+        self.assertEquals(table['device'], ['leaf-1', 'leaf-1', 'leaf-3'])
+        self.assertEquals(table['counters.rx_bytes'], array('l', [100, 5000, 7000]))
+
+        tx_bytes = table['counters.tx_bytes']
+        self.assertEquals(tx_bytes.typecode, 'd')
+        self.assertTrue(math.isnan(tx_bytes[1]))
+        self.assertEquals(sum(tx_bytes[i] for i in (0, 2)), 4.0)
+
+        busy = table.select(value > 1000 for value in table['counters.rx_bytes'])
+        self.assertEquals(busy['device'], ['leaf-1', 'leaf-3'])
+        self.assertEquals(busy['counters.rx_bytes'], array('l', [5000, 7000]))
+
+        # explicit fields, including ones not present
+
+        table = service_table(RESULTS, fields=['interface', 'neighbors', 'bogus'], use_numpy=False)
+        self.assertEquals(table['neighbors'], [None, None, ['spine-1']])
+        self.assertEquals(table['bogus'], [None, None, None])
+
+    @unittest.skipIf(_numpy() is None, "NumPy is not installed")
+    def test_service_table_numpy(self):
+        numpy = _numpy()
+        table = service_table(RESULTS)
+
+        self.assertTrue(table.numpy)
+        self.assertEquals(table['counters.rx_bytes'].dtype, numpy.dtype('int64'))
+        self.assertEquals(table['up'].dtype, numpy.dtype('bool'))
+        self.assertEquals(numpy.nansum(table['counters.tx_bytes']), 4.0)
+
+        busy = table.select(table['counters.rx_bytes'] > 1000)
+        self.assertEquals(list(busy['device']), ['leaf-1', 'leaf-3'])
+
+        records = table.to_records()
+        self.assertEquals(records['interface'].tolist(), ['swp1', 'swp2', 'swp1'])
@@ -0,0 +1,84 @@
+# Copyright 2014-present, Apstra, Inc. All rights reserved.
+#
+# This source code is licensed under End User License Agreement found in the
+# LICENSE file at http://www.apstra.com/community/eula
+
+import os
+import sys
+import json
+import subprocess
+import unittest
+
+# the import time budgets, in microseconds.  the budgets are of the import "self"
+# times, i.e. excluding the modules imported, so that they measure this package
+# rather than the standard library and the machine load: the package budget is for
+# all of the apstra modules imported by `import apstra.aosom.session` together, the
+# module budget is for each apstra module on its own.  both have a generous margin.
+
+PACKAGE_IMPORT_BUDGET_US = 100000
+MODULE_IMPORT_BUDGET_US = 25000
+
+# modules that are only to be imported when used
+
+LAZY_MODULES = ['requests', 'semantic_version', 'multiprocessing.pool',
+                'apstra.aosom.session_modules.catalog']
+
+
+def run_python(*args):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, sys.path)))
+    proc = subprocess.Popen([sys.executable] + list(args), env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    out, err = proc.communicate()
+    if proc.returncode != 0:
+        raise RuntimeError(err.decode())
+
+    return out.decode(), err.decode()
+
+
+class TestImportTime(unittest.TestCase):
+
+    def test_import_lazy_modules(self):
+        out, _ = run_python('-c', (
+            "import sys, json\n"
+            "import apstra.aosom.session\n"
+            "print(json.dumps([m for m in %r if m in sys.modules]))" % LAZY_MODULES))
+
+        self.assertEquals(json.loads(out), [])
+
+    @unittest.skipIf(sys.version_info < (3, 8), "importlib.metadata requires python 3.8")
+    def test_import_without_pkg_resources(self):
+        # pkg_resources alone takes longer to import than all of this package
+
+        out, _ = run_python('-c', (
+            "import sys\n"
+            "import apstra.aosom.session\n"
+            "print('pkg_resources' in sys.modules)"))
+
+        self.assertEquals(out.strip(), 'False')
+
+    @unittest.skipIf(sys.version_info < (3, 7), "-X importtime requires python 3.7")
+    def test_import_time_budget(self):
+        _, err = run_python('-X', 'importtime', '-c', 'import apstra.aosom.session')
+
+        # each line is: "import time: <self-us> | <cumulative-us> | <module>", where
+        # the module name is indented by its import depth
+
+        times = {}
+        for line in err.splitlines():
+            if not line.startswith('import time:'):
+                continue
+
+            fields = line[len('import time:'):].split('|')
+            try:
+                times[fields[2].strip()] = (int(fields[0]), int(fields[1]))
+            except ValueError:
+                continue
+
+        own = {name: self_us for name, (self_us, _) in times.items()
+               if name == 'apstra' or name.startswith('apstra.')}
+
+        self.assertIn('apstra.aosom.session', own)
+        self.assertLess(sum(own.values()), PACKAGE_IMPORT_BUDGET_US)
+
+        for name, self_us in own.items():
+            self.assertLess(self_us, MODULE_IMPORT_BUDGET_US, name)
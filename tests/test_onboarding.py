@@ -0,0 +1,105 @@
+# Copyright 2014-present, Apstra, Inc. All rights reserved.
+#
+# This source code is licensed under End User License Agreement found in the
+# LICENSE file at http://www.apstra.com/community/eula
+
+import re
+
+from utils.common import *
+from apstra.aosom.exc import *
+from apstra.aosom.onboarding import OnboardingPipeline
+
+
+class TestOnboarding(AosPyEzCommonTestCase):
+
+    def setUp(self):
+        super(TestOnboarding, self).setUp()
+        self.aos.login()
+
+        self.devs = self.aos.Devices
+        self.systems = {}
+        self.polls = 0
+
+        for name in ('dev-a', 'dev-b', 'dev-c'):
+            self.add_device(name)
+
+        # each poll of the systems moves the configured devices along to active,
+        # and on the second poll a new device is seen
+
+        def get_systems(_, context):
+            context.status_code = 200
+            self.polls += 1
+            if self.polls == 2:
+                self.add_device('dev-d')
+
+            for item in self.systems.values():
+                if item['status']['state'] == 'OOS-READY':
+                    item['status']['state'] = self.ACTIVE
+
+            return dict(items=list(self.systems.values()))
+
+        def put_config(request, context):
+            dev_id = request.url.rsplit('/', 1)[-1]
+            if dev_id == 'id-dev-c':
+                context.status_code = 400
+                return {}
+
+            context.status_code = 200
+            self.systems[dev_id]['status']['state'] = 'OOS-READY'
+            return {}
+
+        self.pool_puts = []
+
+        def put_pool(request, context):
+            context.status_code = 200
+            self.pool_puts.append(sorted(dev['id'] for dev in request.json()['devices']))
+            return {}
+
+        self.adapter.register_uri('GET', self.devs.url, json=get_systems)
+        self.adapter.register_uri('PUT', re.compile(self.devs.url + '/'), json=put_config)
+        self.adapter.register_uri('GET', self.devs.approved.url, json=dict(devices=[]))
+        self.adapter.register_uri('PUT', self.devs.approved.url, json=put_pool)
+
+    ACTIVE = OnboardingPipeline.ACTIVE
+
+    def add_device(self, name):
+        self.systems['id-' + name] = dict(
+            id='id-' + name, device_key=name,
+            status=dict(state='OOS-QUARANTINED'),
+            facts=dict(aos_hcl_model='Cumulus_VX'))
+
+    def test_onboard_expected(self):
+        pipeline = OnboardingPipeline(
+            self.devs, expected=['dev-a', 'dev-b', 'dev-c', 'dev-d'],
+            location='rack-1', min_interval=0.01, max_interval=0.02, timeout=5)
+
+        results = {result.name: result for result in pipeline.run()}
+        self.assertEquals(sorted(results), ['dev-a', 'dev-b', 'dev-c', 'dev-d'])
+
+        for name in ('dev-a', 'dev-b', 'dev-d'):
+            self.assertEquals(results[name].state, self.ACTIVE)
+            self.assertIsNone(results[name].error)
+            timing = results[name].timing
+            self.assertTrue(timing['discovered'] <= timing['approved'] <= timing['active'])
+
+        self.assertIsInstance(results['dev-c'].error, SessionRqstError)
+
+        # devices found together are approved with a single pool update
+
+        self.assertEquals(self.pool_puts, [['id-dev-a', 'id-dev-b'], ['id-dev-d']])
+
+    def test_onboard_timeout(self):
+        pipeline = OnboardingPipeline(
+            self.devs, expected=['dev-a', 'dev-z'],
+            min_interval=0.01, max_interval=0.02, timeout=0.1)
+
+        results = {result.name: result for result in pipeline.run()}
+        self.assertEquals(results['dev-a'].state, self.ACTIVE)
+        self.assertIsInstance(results['dev-z'].error, WaitTimeoutError)
+        self.assertIsNone(results['dev-z'].state)
+
+    def test_onboard_discovered(self):
+        pipeline = OnboardingPipeline(self.devs, min_interval=0.01, timeout=5)
+        results = list(pipeline.run())
+        self.assertEquals(sorted(result.name for result in results if not result.error),
+                          ['dev-a', 'dev-b', 'dev-d'])
@@ -0,0 +1,118 @@
+# Copyright 2014-present, Apstra, Inc. All rights reserved.
+#
+# This source code is licensed under End User License Agreement found in the
+# LICENSE file at http://www.apstra.com/community/eula
+
+import time
+import threading
+from mock import patch
+
+from utils.common import *
+from apstra.aosom.exc import *
+from apstra.aosom.poller import ServicePoller
+
+
+class TestServicePoller(AosPyEzCommonTestCase):
+
+    def setUp(self):
+        super(TestServicePoller, self).setUp()
+        self.aos.login()
+
+        self.devs = self.aos.Devices
+        json_data = load_mock_server_json_data(cls_name='TestDevices', named='devices')
+        self.adapter.register_uri('GET', self.devs.url, json=json_data[0])
+
+        self.lldp = {}
+        for name in self.devs.names:
+            self.lldp[name] = dict(items=[dict(neighbor='spine-1', port=name)])
+            self.adapter.register_uri('GET', self.devs[name].url + '/lldp',
+                                      json=self.responder(name))
+
+    def responder(self, name):
+        def respond(_, context):
+            context.status_code = 200
+            return self.lldp[name]
+        return respond
+
+    def test_poller_change_detection(self):
+        poller = ServicePoller(self.devs, ['lldp'], interval=60, jitter=0, max_workers=2)
+
+        changes, errors = [], []
+        poller.on_change(lambda dev, service, items: changes.append((dev.name, items)))
+        poller.on_error(lambda dev, service, error: errors.append((dev.name, error)))
+
+        # the first poll of each device is a change
+
+        now = poller.next_due
+        results = poller.poll_due(now)
+        self.assertEquals(sorted(r.device.name for r in results), sorted(self.devs.names))
+        self.assertEquals(len(changes), len(self.devs.names))
+
+        # nothing is due until the interval has passed, and no requests are made
+
+        with patch('apstra.aosom.poller.run_concurrently') as run:
+            self.assertEquals(poller.poll_due(now + 30), [])
+            self.assertFalse(run.called)
+        self.assertEquals(poller.next_due, now + 60)
+
+        # unchanged data is not reported
+
+        del changes[:]
+        name = self.devs.names[0]
+        self.lldp[name] = dict(items=[dict(neighbor='spine-2', port=name)])
+        results = poller.poll_due(now + 60)
+        self.assertEquals([r.device.name for r in results], [name])
+        self.assertEquals(changes, [(name, self.lldp[name]['items'])])
+
+        # failures are reported, and the device is polled again later
+
+        self.adapter.register_uri('GET', self.devs[name].url + '/lldp', status_code=500)
+        results = poller.poll_due(now + 120)
+        self.assertEquals([(r.device.name, type(r.error)) for r in results],
+                          [(name, SessionRqstError)])
+        self.assertEquals([each[0] for each in errors], [name])
+        self.assertEquals(len(poller._schedule), len(self.devs.names))
+
+        # the same device service scheduled twice at the same time
+
+        poller.add(self.devs[name], 'lldp', start=now)
+        poller.add(self.devs[name], 'lldp', start=now)
+        self.assertEquals(len(poller.poll_due(now)), 2)
+
+    def test_poller_callback_error(self):
+        poller = ServicePoller(self.devs, ['lldp'], interval=60, jitter=0, max_workers=2)
+
+        def on_change(dev, service, items):
+            raise ValueError('callback failed')
+
+        poller.on_change(on_change)
+
+        # the exception is raised, but every device is still polled again later
+
+        now = poller.next_due
+        with self.assertRaises(ValueError):
+            poller.poll_due(now)
+
+        self.assertEquals(len(poller._schedule), len(self.devs.names))
+        self.assertEquals(poller.next_due, now + 60)
+
+    def test_poller_jitter_run(self):
+        start = time.time()
+        poller = ServicePoller(self.devs, ['lldp'], select=self.devs.names[:2],
+                               interval=0.2, jitter=0.5)
+
+        self.assertEquals(len(poller._schedule), 2)
+        for due, _, _, _, _ in poller._schedule:
+            self.assertTrue(start <= due <= start + 0.1 + 0.01)
+
+        stop = threading.Event()
+        changes = []
+
+        def on_change(dev, service, items):
+            changes.append(dev.name)
+            if len(changes) == 2:
+                stop.set()
+
+        poller.on_change(on_change)
+        poller.run(stop)
+        self.assertEquals(sorted(changes), sorted(self.devs.names[:2]))
@@ -0,0 +1,95 @@
+# Copyright 2014-present, Apstra, Inc. All rights reserved.
+#
+# This source code is licensed under End User License Agreement found in the
+# LICENSE file at http://www.apstra.com/community/eula
+
+import time
+import unittest
+
+from apstra.aosom.exc import *
+from apstra.aosom.polling import Backoff, PollMetrics, poll
+
+
+class TestPolling(unittest.TestCase):
+
+    def test_backoff_delays(self):
+        backoff = Backoff(initial=0.1, factor=2, max_delay=0.5, jitter=0)
+        self.assertEquals([backoff.next_delay() for _ in range(5)],
+                          [0.1, 0.2, 0.4, 0.5, 0.5])
+
+        backoff.reset()
+        self.assertEquals(backoff.next_delay(), 0.1)
+
+        backoff = Backoff(initial=1.0, jitter=0.1)
+        for _ in range(20):
+            backoff.reset()
+            self.assertTrue(0.9 <= backoff.next_delay() <= 1.1)
+
+    def test_poll_ready(self):
+        metrics = PollMetrics()
+        answers = iter([None, False, 'ready'])
+
+        start = time.time()
+        result = poll(lambda: next(answers), timeout=5, name='thing', metrics=metrics,
+                      backoff=Backoff(initial=0.01, jitter=0))
+
+        self.assertEquals(result.value, 'ready')
+        self.assertEquals(result.attempts, 3)
+        self.assertLess(time.time() - start, 1)
+
+        # the given backoff is not changed by the wait
+
+        backoff = Backoff(initial=0.01, max_delay=0.02, jitter=0)
+        answers = iter([None, None, None, True])
+        poll(lambda: next(answers), timeout=5, backoff=backoff, metrics=metrics)
+        self.assertEquals(backoff.next_delay(), 0.01)
+        self.assertEquals(backoff.fresh().next_delay(), 0.01)
+
+        stats = metrics.stats('thing')
+        self.assertEquals((stats['count'], stats['timeouts'], stats['attempts']), (1, 0, 3))
+        self.assertEquals(stats['mean'], result.elapsed)
+
+        # ready at once, without any delay
+
+        self.assertEquals(poll(lambda: 1, timeout=0, name='thing', metrics=metrics).attempts, 1)
+        self.assertEquals(metrics.stats('thing')['count'], 2)
+        self.assertEquals(list(metrics.stats()), ['thing'])
+
+        metrics.reset()
+        self.assertIsNone(metrics.stats('thing'))
+
+    def test_poll_timeout(self):
+        metrics = PollMetrics()
+        backoff = Backoff(initial=0.01, jitter=0)
+
+        with self.assertRaises(WaitTimeoutError):
+            poll(lambda: False, timeout=0.05, backoff=backoff, name='thing', metrics=metrics)
+
+        self.assertEquals(metrics.stats('thing')['timeouts'], 1)
+        self.assertIsNone(metrics.stats('thing')['mean'])
+
+        # the last exception is raised when the check keeps failing
+
+        def failing():
+            raise AccessValueError('not yet')
+
+        backoff.reset()
+        with self.assertRaises(AccessValueError):
+            poll(failing, timeout=0.05, backoff=backoff, retry_on=(SessionError,))
+
+        # other exceptions are not retried
+
+        calls = []
+
+        def broken():
+            calls.append(1)
+            raise KeyError('broken')
+
+        with self.assertRaises(KeyError):
+            poll(broken, timeout=5, retry_on=(SessionError,))
+
+        self.assertEquals(len(calls), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+# Copyright 2014-present, Apstra, Inc. All rights reserved.
+#
+# This source code is licensed under End User License Agreement found in the
+# LICENSE file at http://www.apstra.com/community/eula
+
+import re
+import time
+import threading
+from contextlib import contextmanager
+
+from utils.common import *
+from apstra.aosom.exc import *
+from apstra.aosom.polling import Backoff
+from apstra.aosom.provisioning import BlueprintSpec, ProvisioningPipeline
+
+SLOTS = ['resource_pools', 'external_links']
+
+
+class TestProvisioning(AosPyEzCommonTestCase):
+
+    def setUp(self):
+        super(TestProvisioning, self).setUp()
+        self.aos.login()
+
+        self.blueprints = self.aos.Blueprints
+        self.written = {}
+        self.lock = threading.Lock()
+        self.in_flight = self.max_in_flight = 0
+
+        url = self.blueprints.url
+
+        # a blueprint has build errors until each of its slots is written
+
+        def post_blueprint(request, context):
+            with self.tracked():
+                name = request.json()['display_name']
+                if name == 'bp-bad':
+                    context.status_code = 400
+                    return {}
+                self.written['id-' + name] = set()
+                context.status_code = 200
+                return dict(id='id-' + name)
+
+        def get_contents(request, context):
+            with self.tracked():
+                bp_id = request.url.rsplit('/', 1)[-1]
+                context.status_code = 200
+                missing = set(SLOTS) - self.written[bp_id]
+                return dict(id=bp_id, errors=sorted(missing) if missing else None)
+
+        def get_slots(_, context):
+            with self.tracked():
+                context.status_code = 200
+                return dict(items=[dict(name=slot, slot_type='STRING', ids=[]) for slot in SLOTS])
+
+        def put_slot(request, context):
+            with self.tracked():
+                bp_id, _, slot = request.url.rsplit('/', 3)[-3:]
+                self.written[bp_id].add(slot)
+                context.status_code = 200
+                return {}
+
+        self.adapter.register_uri('GET', url, json=dict(items=[]))
+        self.adapter.register_uri('POST', url, json=post_blueprint)
+        self.adapter.register_uri('GET', re.compile(url + '/id-[^/]+$'), json=get_contents)
+        self.adapter.register_uri('GET', re.compile(url + '/id-[^/]+/slots$'), json=get_slots)
+        self.adapter.register_uri('PUT', re.compile(url + '/id-[^/]+/slots/'), json=put_slot)
+
+    @contextmanager
+    def tracked(self):
+        # counts the concurrent requests, each held long enough to overlap
+
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.01)
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def test_provision_many(self):
+        specs = [BlueprintSpec('bp-%d' % idx, 'template-id', 'two_stage_l3clos',
+                               {slot: dict(value=idx) for slot in SLOTS})
+                 for idx in range(6)]
+
+        # a blueprint with an unknown slot, and one that cannot be created
+
+        specs.append(BlueprintSpec('bp-slot', 'template-id', 'two_stage_l3clos',
+                                   dict(no_such_slot={})))
+        specs.append(BlueprintSpec('bp-bad', 'template-id', 'two_stage_l3clos', {}))
+
+        pipeline = ProvisioningPipeline(self.blueprints, specs, max_workers=3,
+                                        backoff=Backoff(initial=0.01, jitter=0))
+
+        # the collection cache is only changed by the calling thread
+
+        added = []
+        self.blueprints.subscribe(
+            lambda _, event, item, __: added.append((event, threading.current_thread())))
+
+        results = {result.name: result for result in pipeline.run()}
+        self.assertEquals(len(results), 8)
+        self.assertLessEqual(self.max_in_flight, 3)
+        self.assertEquals(set(thread for _, thread in added), {threading.current_thread()})
+        self.assertEquals([event for event, _ in added].count('add'), 7)
+
+        for idx in range(6):
+            result = results['bp-%d' % idx]
+            self.assertIsNone(result.error)
+            self.assertEquals(result.item.id, 'id-bp-%d' % idx)
+            self.assertEquals(sorted(result.timing), ['build', 'create', 'params', 'queued'])
+            self.assertEquals(self.written[result.item.id], set(SLOTS))
+
+        self.assertEquals(results['bp-slot'].stage, 'params')
+        self.assertIsInstance(results['bp-slot'].error, KeyError)
+        self.assertIsNotNone(results['bp-slot'].item)
+
+        self.assertEquals(results['bp-bad'].stage, 'create')
+        self.assertIsInstance(results['bp-bad'].error, SessionRqstError)
+        self.assertIsNone(results['bp-bad'].item)
+        self.assertEquals(sorted(results['bp-bad'].timing), ['create', 'queued'])
+
+    def test_provision_build_timeout(self):
+        spec = BlueprintSpec('bp-0', 'template-id', 'two_stage_l3clos', {SLOTS[0]: {}})
+        pipeline = ProvisioningPipeline(self.blueprints, [spec], build_timeout=100,
+                                        backoff=Backoff(initial=0.01, jitter=0))
+
+        result, = list(pipeline.run())
+        self.assertEquals(result.stage, 'build')
+        self.assertIsInstance(result.error, WaitTimeoutError)
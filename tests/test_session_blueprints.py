@@ -7,6 +7,7 @@
 from utils.common import *
 
 from apstra.aosom.exc import *
+from apstra.aosom.polling import Backoff
 
 
 class TestBlueprintCollection(AosPyEzCommonTestCase):
@@ -117,3 +118,85 @@ class TestBlueprintCollection(AosPyEzCommonTestCase):
             reference_arch='fake_reference_arch')
 
         self.assertTrue(result)
+
+    def test_blueprint_contents_cached(self):
+        item = self.bp_item
+        version = dict(etag='"v1"', transfers=0)
+
+        def get_contents(request, context):
+            if request.headers.get('If-None-Match') == version['etag']:
+                context.status_code = 304
+                return None
+
+            version['transfers'] += 1
+            context.status_code = 200
+            context.headers['ETag'] = version['etag']
+            return self.bp_item_data
+
+        self.adapter.register_uri('GET', item.url, json=get_contents)
+
+        # the contents are only transferred again when changed
+
+        self.assertEquals(item.contents, self.bp_item_data)
+        self.assertIsNone(item.build_errors)
+        self.assertTrue(item.await_build_ready())
+        self.assertEquals(version['transfers'], 1)
+
+        # the cache is shared by all instances of the blueprint item
+
+        self.assertIs(self.blueprints[item.name].contents, item.contents)
+        self.assertEquals(version['transfers'], 1)
+
+        self.bp_item_data['errors'] = ['i_am_an_error']
+        version['etag'] = '"v2"'
+        try:
+            self.assertEquals(item.build_errors, ['i_am_an_error'])
+            self.assertEquals(version['transfers'], 2)
+        finally:
+            del self.bp_item_data['errors']
+
+        item.get_contents(refresh=True)
+        self.assertEquals(version['transfers'], 3)
+
+        # deleting the blueprint discards the cached contents
+
+        self.adapter.register_uri('DELETE', item.url, status_code=200)
+        item_id = item.id
+        item.delete()
+        self.assertFalse(item_id in self.blueprints._contents)
+
+    def test_blueprint_await_all_build_ready(self):
+        blueprints = self.aos.Blueprints
+        self.adapter.register_uri('GET', blueprints.url, json=dict(items=[
+            dict(id='id-%s' % name, display_name=name) for name in ('bp-a', 'bp-b', 'bp-c')]))
+        blueprints.digest()
+
+        checks = dict.fromkeys(['bp-a', 'bp-b', 'bp-c'], 0)
+
+        def responder(name, ready_after):
+            def respond(_, context):
+                checks[name] += 1
+                context.status_code = 200
+                if ready_after is not None and checks[name] > ready_after:
+                    return dict(id='id-' + name)
+                return dict(id='id-' + name, errors=['not-yet'])
+            return respond
+
+        for name, ready_after in (('bp-a', 0), ('bp-b', 2), ('bp-c', None)):
+            self.adapter.register_uri('GET', blueprints[name].url,
+                                      json=responder(name, ready_after))
+
+        results = list(blueprints.await_all_build_ready(
+            ['bp-a', 'bp-b', blueprints['bp-c']], timeout=300,
+            backoff=Backoff(initial=0.02, max_delay=0.05), max_workers=2))
+
+        self.assertEquals([(r.item.name, r.ready) for r in results],
+                          [('bp-a', True), ('bp-b', True), ('bp-c', False)])
+        self.assertEquals(results[2].errors, ['not-yet'])
+        self.assertTrue(results[0].elapsed <= results[1].elapsed <= results[2].elapsed)
+
+        # each blueprint is no longer checked once it is ready
+
+        self.assertEquals(checks['bp-a'], 1)
+        self.assertEquals(checks['bp-b'], 3)
+        self.assertTrue(checks['bp-c'] >= 3)
@@ -3,7 +3,7 @@
 # This source code is licensed under End User License Agreement found in the
 # LICENSE file at http://www.apstra.com/community/eula
 
-from copy import copy
+from copy import copy, deepcopy
 from utils.common import *
 
 from apstra.aosom.exc import *
@@ -50,12 +50,17 @@ class TestDevices(AosPyEzCommonTestCase):
         # mock update failure
         self.adapter.register_uri('PUT', self.devs.approved.url, status_code=400)
         try:
-            self.devs.approved.update(device_keys=['this', 'that'])
+            self.devs.approved.update(device_keys=['this', 'other'])
         except SessionRqstError:
             pass
         else:
             self.fail("SessionRqstError not raised as expected")
 
+        # the devices not approved are not in the cached pool
+
+        self.assertEquals(self.devs.approved.ids, [d['id'] for d in self.approved['devices']])
+        self.assertFalse(self.devs.approved.is_approved('other'))
+
     def test_device_information(self):
         self.assertTrue(all([d.is_approved for d in self.devs]))
 
@@ -139,3 +144,212 @@ class TestDevices(AosPyEzCommonTestCase):
         self.adapter.register_uri('GET', dev.url, json=mock_dev_data)
         self.assertEquals(dev.services.names, mock_dev_service_list)
         self.assertEquals(str(mock_dev_service_list), str(dev.services))
+
+    def test_devices_approved_cached(self):
+        def approved_gets():
+            return len([rqst for rqst in self.adapter.request_history
+                        if rqst.method == 'GET' and rqst.url == self.devs.approved.url])
+
+        # the approved pool is retrieved once for all of the devices
+
+        self.assertTrue(all([d.is_approved for d in self.devs]))
+        self.assertEquals(approved_gets(), 1)
+
+        status = self.devs.approval_status(self.devs.names + ['no-such-device'])
+        self.assertTrue(all(status[name] for name in self.devs.names))
+        self.assertFalse(status['no-such-device'])
+        self.assertEquals(approved_gets(), 1)
+
+        # an update is reflected locally, without retrieving the pool again
+
+        self.adapter.register_uri('PUT', self.devs.approved.url, status_code=200)
+        self.devs.approved.update(device_keys=['this'])
+        self.assertEquals(approved_gets(), 2)
+        self.assertTrue(self.devs.approved.is_approved('this'))
+        self.assertEquals(self.devs.approved.ids[-1], 'this')
+        self.assertEquals(approved_gets(), 2)
+
+        # the pool is retrieved again once the cached value is too old
+
+        self.devs.approved.max_age = 0
+        self.devs.approved._fetched_at -= 1
+        self.assertFalse(self.devs.approved.is_approved('this'))
+        self.assertEquals(approved_gets(), 3)
+
+        self.devs.approved.invalidate()
+        _ = self.devs.approved.ids
+        self.assertEquals(approved_gets(), 4)
+
+    def test_devices_approve_many(self):
+        names = self.devs.names
+        quarantined = names[:3]
+        for name in quarantined:
+            self.devs[name].value['status']['state'] = 'OOS-QUARANTINED'
+
+        configs = {}
+
+        def do_config(request, context):
+            context.status_code = 200
+            configs[request.url] = request.json()['user_config']
+            return {}
+
+        for name in names:
+            self.adapter.register_uri('PUT', self.devs[name].url, json=do_config)
+
+        pool_puts = []
+
+        def do_pool(request, context):
+            context.status_code = 200
+            pool_puts.append([dev['id'] for dev in request.json()['devices']])
+            return {}
+
+        self.adapter.register_uri('PUT', self.devs.approved.url, json=do_pool)
+        self.adapter.register_uri('GET', self.devs.approved.url, json=dict(devices=[]))
+
+        # one device fails, the others are approved with a single pool update
+
+        self.adapter.register_uri('PUT', self.devs[quarantined[2]].url, status_code=400)
+
+        try:
+            self.devs.approve_many(location=lambda dev: 'rack-' + dev.name, max_workers=2)
+        except BulkRqstError as exc:
+            self.assertEquals([result.arg.name for result in exc.errors], [quarantined[2]])
+        else:
+            self.fail("BulkRqstError not raised as expected")
+
+        approved = [self.devs[name] for name in quarantined[:2]]
+        self.assertEquals(sorted(configs), sorted(dev.url for dev in approved))
+        for dev in approved:
+            self.assertEquals(configs[dev.url]['location'], 'rack-' + dev.name)
+
+        self.assertEquals(len(pool_puts), 1)
+        self.assertEquals(sorted(pool_puts[0]), sorted(dev.id for dev in approved))
+
+        # selection by name; devices not quarantined are skipped
+
+        self.adapter.register_uri('PUT', self.devs[quarantined[2]].url, json=do_config)
+        done = self.devs.approve_many([quarantined[2], names[-1]], location='here')
+        self.assertEquals([dev.name for dev in done], [quarantined[2]])
+        self.assertEquals(len(pool_puts), 2)
+
+    @mock_server_json_data_named('test_device_service_get', testcase='TestDevices')
+    def test_devices_fetch_services(self, json_data):
+        names = self.devs.names
+        for name in names:
+            dev_url = self.devs[name].url
+            self.adapter.register_uri('GET', dev_url + '/lldp', json=json_data[0])
+            self.adapter.register_uri('GET', dev_url + '/arp', json=dict(items=[]))
+
+        self.adapter.register_uri('GET', self.devs[names[0]].url + '/arp', status_code=400)
+
+        results = list(self.devs.fetch_services(['lldp', 'arp'], max_workers=4))
+        self.assertEquals(len(results), 2 * len(names))
+
+        failed = [(r.device.name, r.service) for r in results if r.error]
+        self.assertEquals(failed, [(names[0], 'arp')])
+        self.assertIsInstance(next(r.error for r in results if r.error), SessionRqstError)
+
+        for result in results:
+            if result.service == 'lldp':
+                self.assertEquals(result.items, json_data[0]['items'])
+
+        # a single service, selected devices
+
+        results = list(self.devs.fetch_services('lldp', devices=lambda dev: dev.name == names[1]))
+        self.assertEquals([(r.device.name, r.service, r.error) for r in results],
+                          [(names[1], 'lldp', None)])
+
+    def test_devices_index(self):
+        devices = deepcopy(self.devices)
+        for item in devices['items'][:2]:
+            item['status']['state'] = 'OOS-QUARANTINED'
+
+        names = [item['device_key'] for item in devices['items']]
+        ids = [item['id'] for item in devices['items']]
+
+        self.adapter.register_uri('GET', self.devs.url, json=devices)
+        self.adapter.register_uri('GET', self.devs.approved.url, json=dict(
+            devices=[dict(id=dev_id) for dev_id in ids[2:]]))
+
+        index = self.devs.index
+        self.assertEquals(index.states, {'OOS-QUARANTINED': 2, 'IS-ACTIVE': 3})
+        self.assertEquals(sorted(index.names(state='OOS-QUARANTINED')), sorted(names[:2]))
+        self.assertEquals(index.count(model='Arista_vEOS'), 1)
+        self.assertEquals(index.count(state='IS-ACTIVE', model='Cumulus_VX'), 3)
+        self.assertEquals(sorted(index.names(approved=False)), sorted(names[:2]))
+        self.assertEquals(index.count(approved=True, state='IS-ACTIVE'), 3)
+        self.assertEquals(index.count(state='NO-SUCH-STATE'), 0)
+        self.assertEquals(index.count(), 5)
+
+        # a refresh re-indexes only what changed
+
+        devices['items'][0]['status']['state'] = 'IS-ACTIVE'
+        del devices['items'][4]
+        self.devs.digest()
+
+        self.assertEquals(index.states, {'OOS-QUARANTINED': 1, 'IS-ACTIVE': 3})
+        self.assertEquals(index.names(state='OOS-QUARANTINED'), [names[1]])
+        self.assertFalse(names[4] in index.names())
+
+        # items added to the collection are indexed
+
+        new_dev = self.devs['new-device']
+        new_dev.datum = dict(device_key='new-device', id='new-id',
+                             status=dict(state='OOS-QUARANTINED'), facts=dict(aos_hcl_model='Arista_vEOS'))
+        self.devs += new_dev
+        self.assertEquals(sorted(index.names(state='OOS-QUARANTINED', model='Arista_vEOS')),
+                          sorted([names[1], 'new-device']))
+        self.assertTrue('new-device' in index.names(approved=False))
+
+        # as are the items written or read
+
+        dev = self.devs[names[1]]
+        self.adapter.register_uri('GET', dev.url, json=dict(
+            dev.value, status=dict(state='IS-ACTIVE')))
+        dev.read()
+        self.assertEquals(index.names(state='OOS-QUARANTINED', model='Cumulus_VX'), [])
+
+        self.adapter.register_uri('PUT', dev.url, json={})
+        dev.write(dict(dev.value, device_key='renamed-device'), readback=False)
+        self.assertTrue('renamed-device' in index.names(state='IS-ACTIVE'))
+        self.assertFalse(names[1] in index.names())
+
+    def test_device_user_config_cached(self):
+        dev = self.devs[self.devs.names[0]]
+        record = deepcopy(dev.value)
+        self.adapter.register_uri('GET', dev.url, json=lambda request, context: record)
+
+        def device_gets():
+            return len([rqst for rqst in self.adapter.request_history
+                        if rqst.method == 'GET' and rqst.url == dev.url])
+
+        # the value from the digest is used until it is too old
+
+        for _ in range(10):
+            self.assertEquals(dev.user_config, record['user_config'])
+        self.assertEquals(device_gets(), 0)
+
+        self.devs._user_config_at[dev.id] -= self.devs.USER_CONFIG_MAX_AGE + 1
+        for _ in range(10):
+            self.assertEquals(dev.user_config, record['user_config'])
+        self.assertEquals(device_gets(), 1)
+
+        # the value set is used without retrieving it again, also by other
+        # instances of the same device
+
+        value = dict(record['user_config'], location='rack-12')
+        self.adapter.register_uri('PUT', dev.url, status_code=200)
+        dev.user_config = value
+
+        self.assertEquals(dev.user_config, value)
+        self.assertEquals(self.devs[dev.name].user_config, value)
+        self.assertEquals(device_gets(), 1)
+
+        # explicit refresh, and expiry
+
+        self.assertEquals(dev.get_user_config(refresh=True), record['user_config'])
+        self.assertEquals(device_gets(), 2)
+
+        self.devs._user_config_at[dev.id] -= self.devs.USER_CONFIG_MAX_AGE + 1
+        _ = dev.user_config
+        self.assertEquals(device_gets(), 3)
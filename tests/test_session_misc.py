@@ -5,6 +5,8 @@
 
 
 from utils.common import *
+from apstra.aosom.exc import *
+from apstra.aosom.workers import run_concurrently
 
 
 class TestMiscCollections(AosPyEzCommonTestCase):
@@ -30,3 +32,55 @@ class TestMiscCollections(AosPyEzCommonTestCase):
 
         item = asn_pools[asn_pools.names[0]]
         self.assertTrue(item.in_use)
+
+    def test_session_prefetch(self):
+        names = ['IpPools', 'AsnPools', 'Blueprints']
+        for name in names:
+            self.adapter.register_uri('GET', getattr(self.aos, name).url, json=dict(items=[
+                dict(id='id-%s' % name, display_name=name)]))
+
+        timing = self.aos.prefetch(names, max_workers=2)
+        self.assertEquals(sorted(timing), sorted(names))
+
+        # the collections are cached, so no further requests are made
+
+        count = len(self.adapter.request_history)
+        for name in names:
+            self.assertEquals(getattr(self.aos, name).names, [name])
+        self.assertEquals(len(self.adapter.request_history), count)
+
+        self.adapter.register_uri('GET', self.aos.AsnPools.url, status_code=500)
+        try:
+            self.aos.prefetch(names)
+        except BulkRqstError as exc:
+            self.assertEquals([result.arg for result in exc.errors], ['AsnPools'])
+        else:
+            self.fail("BulkRqstError not raised as expected")
+
+        try:
+            self.aos.prefetch(['NoSuchThing'])
+        except SessionError:
+            pass
+        else:
+            self.fail("SessionError not raised as expected")
+
+    def test_run_concurrently_lazy(self):
+        taken = []
+
+        def args():
+            for idx in range(100):
+                taken.append(idx)
+                yield idx
+
+        results = run_concurrently(lambda idx: idx * 2, args(), max_workers=2)
+        self.assertEquals(next(results).value % 2, 0)
+        self.assertLessEqual(len(taken), 6)
+
+        # stopping early does not consume the rest of the arguments
+
+        results.close()
+        self.assertLess(len(taken), 100)
+
+        values = [result.value for result in run_concurrently(
+            lambda idx: idx * 2, range(100), max_workers=3)]
+        self.assertEquals(sorted(values), list(range(0, 200, 2)))
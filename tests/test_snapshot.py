@@ -0,0 +1,120 @@
+# Copyright 2014-present, Apstra, Inc. All rights reserved.
+#
+# This source code is licensed under End User License Agreement found in the
+# LICENSE file at http://www.apstra.com/community/eula
+
+
+import shutil
+import tempfile
+from os import path
+
+from utils.common import *
+from apstra.aosom.exc import *
+from apstra.aosom.snapshot import Snapshot, SnapshotWriter
+
+
+class TestSnapshot(AosPyEzCommonTestCase):
+
+    def setUp(self):
+        super(TestSnapshot, self).setUp()
+        self.aos.login()
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    @mock_server_json_data_named('ip_pools', testcase='*')
+    def test_snapshot_collection(self, json_data):
+        ip_pools = self.aos.IpPools
+        self.adapter.register_uri('GET', ip_pools.url, json=json_data[0])
+
+        filepath = path.join(self.tmpdir, 'ip_pools.snap')
+        ip_pools.snapshot_save(filepath)
+
+        for use_mmap in (True, False):
+            with Snapshot(filepath, use_mmap=use_mmap) as snap:
+                self.assertEquals(snap.meta['uri'], ip_pools.URI)
+                self.assertEquals(snap.keys(), ip_pools.names)
+                self.assertEquals(len(snap), len(ip_pools.names))
+
+                # random access to a single item
+
+                a_name = ip_pools.names[-1]
+                self.assertTrue(a_name in snap)
+                self.assertEquals(snap[a_name], ip_pools[a_name].value)
+                self.assertIsNone(snap.get('does not exist'))
+
+                self.assertEquals(snap.to_dict(), ip_pools.cache['by_%s' % ip_pools.LABEL])
+
+    def test_snapshot_blueprint(self):
+        blueprints = self.aos.Blueprints
+        bp_id = 'fake-bp-id'
+        self.adapter.register_uri('GET', blueprints.url, json=dict(items=[
+            dict(id=bp_id, display_name='my-blueprint')]))
+
+        contents = dict(
+            id=bp_id,
+            display_name='my-blueprint',
+            nodes={'node-%d' % i: dict(id='node-%d' % i, role='leaf') for i in range(50)},
+            anomaly_counts=dict(all=0, bgp=0))
+
+        bp = blueprints['my-blueprint']
+        self.adapter.register_uri('GET', bp.url, json=contents)
+
+        filepath = path.join(self.tmpdir, 'bp.snap')
+        bp.snapshot_save(filepath)
+
+        with Snapshot(filepath) as snap:
+            self.assertEquals(snap.meta['split'], ['nodes'])
+            self.assertEquals(snap['nodes/node-7'], contents['nodes']['node-7'])
+            self.assertEquals(snap['anomaly_counts'], contents['anomaly_counts'])
+            self.assertEquals(snap.to_dict(), contents)
+
+    def test_snapshot_bad_file(self):
+        filepath = path.join(self.tmpdir, 'bad.snap')
+
+        with open(filepath, 'w') as ofile:
+            ofile.write('this is not a snapshot')
+
+        try:
+            Snapshot(filepath)
+        except SnapshotFormatError:
+            pass
+        else:
+            self.fail("SnapshotFormatError not raised as expected")
+
+        # a snapshot file that was never closed has no index
+
+        writer = SnapshotWriter(filepath)
+        writer.add('key', dict(value=1))
+        writer._file.close()
+
+        try:
+            Snapshot(filepath, use_mmap=False)
+        except SnapshotFormatError:
+            pass
+        else:
+            self.fail("SnapshotFormatError not raised as expected")
+
+        # a snapshot whose index is corrupt
+
+        with SnapshotWriter(filepath) as writer:
+            writer.add('key', dict(value=1))
+
+        with open(filepath, 'r+b') as ofile:
+            ofile.seek(-(8 + 12 + 4), 2)
+            ofile.write(b'\xff\xff\xff\xff')
+
+        for use_mmap in (True, False):
+            with self.assertRaises(SnapshotFormatError):
+                Snapshot(filepath, use_mmap=use_mmap)
+
+        # a snapshot written with an error is left incomplete
+
+        with self.assertRaises(RuntimeError):
+            with SnapshotWriter(filepath) as writer:
+                writer.add('key', dict(value=1))
+                raise RuntimeError('interrupted')
+
+        with self.assertRaises(SnapshotFormatError):
+            Snapshot(filepath)
@@ -0,0 +1,187 @@
+# Copyright 2014-present, Apstra, Inc. All rights reserved.
+#
+# This source code is licensed under End User License Agreement found in the
+# LICENSE file at http://www.apstra.com/community/eula
+
+
+from copy import copy
+
+from utils.common import *
+from apstra.aosom.exc import *
+
+
+class TestUnitOfWork(AosPyEzCommonTestCase):
+
+    def setUp(self):
+        super(TestUnitOfWork, self).setUp()
+        self.aos.login()
+
+        json_data = load_mock_server_json_data(cls_name='any', named='ip_pools')
+
+        self.ip_pools = self.aos.IpPools
+        self.blueprints = self.aos.Blueprints
+
+        self.adapter.register_uri('GET', self.ip_pools.url, json=json_data[0])
+        self.adapter.register_uri('GET', self.blueprints.url, json=dict(items=[]))
+
+        self.posted = []
+
+        def do_post(request, context):
+            context.status_code = 201
+            body = request.json()
+            self.posted.append((request.url, body))
+            return dict(id='id-' + body['display_name'])
+
+        self.adapter.register_uri('POST', self.ip_pools.url, json=do_post)
+        self.adapter.register_uri('POST', self.blueprints.url, json=do_post)
+
+    def test_uow_coalesce(self):
+        uow = self.aos.unit_of_work()
+
+        # create followed by a write is a single create of the written value
+
+        new_pool = self.ip_pools['new-pool']
+        uow.create(new_pool, dict(subnets=[]))
+        uow.write(new_pool, dict(subnets=[dict(network='1.1.1.0/24')]))
+
+        # a write without a value keeps the queued value
+
+        uow.write(new_pool)
+
+        # create followed by a delete cancels out
+
+        gone_pool = self.ip_pools['gone-pool']
+        uow.write(gone_pool, dict(subnets=[]))
+        uow.delete(gone_pool)
+
+        # multiple writes of an existing item are a single PUT of the last value
+
+        has_pool = self.ip_pools[self.ip_pools.names[0]]
+        self.adapter.register_uri('PUT', has_pool.url, json={})
+        first, last = copy(has_pool.value), copy(has_pool.value)
+        first['tags'], last['tags'] = ['first'], ['last']
+        uow.write(has_pool, first)
+        uow.write(has_pool, last)
+
+        self.assertEquals(len(uow), 2)
+        done = uow.flush()
+
+        self.assertEquals(len(done), 2)
+        self.assertEquals(len(uow), 0)
+        self.assertEquals(self.posted, [
+            (self.ip_pools.url, dict(display_name='new-pool', subnets=[dict(network='1.1.1.0/24')]))])
+
+        puts = [rqst for rqst in self.adapter.request_history if rqst.method == 'PUT']
+        self.assertEquals(len(puts), 1)
+        self.assertEquals(puts[0].json(), last)
+
+        # the collection caches now reflect the changes
+
+        self.assertTrue('new-pool' in self.ip_pools)
+        self.assertFalse('gone-pool' in self.ip_pools)
+        self.assertEquals(self.ip_pools.find(uid=has_pool.id).value['tags'], ['last'])
+
+    def test_uow_queue_errors(self):
+        uow = self.aos.unit_of_work()
+        has_pool = self.ip_pools[self.ip_pools.names[0]]
+
+        try:
+            uow.create(has_pool)
+        except DuplicateError:
+            pass
+        else:
+            self.fail("DuplicateError not raised as expected")
+
+        new_pool = self.ip_pools['new-pool']
+        uow.create(new_pool, dict(subnets=[]))
+        try:
+            uow.create(new_pool, dict(subnets=[]))
+        except DuplicateError:
+            pass
+        else:
+            self.fail("DuplicateError not raised as expected")
+
+        uow.delete(has_pool)
+        try:
+            uow.write(has_pool, dict(tags=[]))
+        except AccessValueError:
+            pass
+        else:
+            self.fail("AccessValueError not raised as expected")
+
+        uow.discard()
+        self.assertEquals(uow.pending, [])
+
+    def test_uow_flush_order(self):
+        with self.aos.unit_of_work(max_workers=4) as uow:
+            uow.create(self.blueprints['new-blueprint'], dict(template_id='fake'))
+            for name in ('pool-a', 'pool-b', 'pool-c'):
+                uow.create(self.ip_pools[name], dict(subnets=[]))
+
+            # nothing is sent until the flush
+
+            self.assertEquals(self.posted, [])
+
+        urls = [url for url, _ in self.posted]
+        self.assertEquals(urls, [self.ip_pools.url] * 3 + [self.blueprints.url])
+        self.assertTrue('new-blueprint' in self.blueprints)
+
+        # deletes are done in reverse dependency order
+
+        pool = self.ip_pools['pool-a']
+        blueprint = self.blueprints['new-blueprint']
+        pool_url, blueprint_url = pool.url, blueprint.url
+        self.adapter.register_uri('DELETE', pool_url, status_code=202)
+        self.adapter.register_uri('DELETE', blueprint_url, status_code=202)
+
+        with self.aos.unit_of_work() as uow:
+            uow.delete(pool)
+            uow.delete(blueprint)
+
+        deletes = [rqst.url for rqst in self.adapter.request_history if rqst.method == 'DELETE']
+        self.assertEquals(deletes, [blueprint_url, pool_url])
+        self.assertFalse('pool-a' in self.ip_pools)
+
+    def test_uow_flush_error(self):
+        uow = self.aos.unit_of_work()
+        uow.create(self.ip_pools['pool-a'], dict(subnets=[]))
+        uow.create(self.ip_pools['pool-bad'], dict(subnets=[]))
+        uow.create(self.blueprints['new-blueprint'], dict(template_id='fake'))
+
+        def do_post(request, context):
+            body = request.json()
+            if body['display_name'] == 'pool-bad':
+                context.status_code = 400
+                return {}
+
+            context.status_code = 201
+            return dict(id='id-' + body['display_name'])
+
+        self.adapter.register_uri('POST', self.ip_pools.url, json=do_post)
+
+        try:
+            uow.flush()
+        except FlushError as exc:
+            self.assertEquals([str(r.arg) for r in exc.errors],
+                              ['create %s/pool-bad' % self.ip_pools.URI])
+            self.assertIsInstance(exc.errors[0].error, SessionRqstError)
+            self.assertEquals([str(op) for op in exc.not_attempted],
+                              ['create %s/new-blueprint' % self.blueprints.URI])
+        else:
+            self.fail("FlushError not raised as expected")
+
+        # the successful create is in the cache, the blueprint that depends
+        # on the pools was not attempted, and remains queued
+
+        self.assertTrue('pool-a' in self.ip_pools)
+        self.assertFalse('pool-bad' in self.ip_pools)
+        self.assertFalse('new-blueprint' in self.blueprints)
+        self.assertEquals(self.posted, [])
+        self.assertEquals([str(op) for op in uow.pending],
+                          ['create %s/new-blueprint' % self.blueprints.URI])
+
+        # it is executed by the next flush
+
+        uow.flush()
+        self.assertTrue('new-blueprint' in self.blueprints)
+        self.assertEquals(uow.pending, [])